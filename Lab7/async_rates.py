@@ -0,0 +1,78 @@
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+
+class AsyncRateClient:
+    """Fetches many currency pairs concurrently from GET /rate.
+
+    At most ``concurrency`` requests are in flight at once, and concurrent
+    lookups of the same pair share a single request.
+    """
+
+    def __init__(self, base_url: str, concurrency: int = 20, timeout: float = 10.0,
+                 session: Optional[aiohttp.ClientSession] = None):
+        if concurrency <= 0:
+            raise ValueError("Concurrency must be positive")
+        self._base_url = base_url
+        self._concurrency = concurrency
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.requests_sent = 0
+
+    async def __aenter__(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_rate(self, from_currency: str, to_currency: str) -> float:
+        key = (from_currency, to_currency)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(from_currency, to_currency))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def get_rates(self, pairs: Iterable[Tuple[str, str]],
+                        return_exceptions: bool = False) -> Dict[Tuple[str, str], float]:
+        pairs = list(dict.fromkeys(pairs))
+        results = await asyncio.gather(*(self.get_rate(*pair) for pair in pairs),
+                                       return_exceptions=return_exceptions)
+        return dict(zip(pairs, results))
+
+    async def _fetch(self, from_currency, to_currency):
+        if self._session is None:
+            raise RuntimeError("Client is not started, use 'async with'")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        async with self._semaphore:
+            self.requests_sent += 1
+            async with self._session.get(f"{self._base_url}/rate", params={
+                "from": from_currency,
+                "to": to_currency
+            }) as response:
+                response.raise_for_status()
+                return (await response.json())["rate"]
+
+
+async def get_exchange_rates_async(base_url, pairs, concurrency=20, return_exceptions=False):
+    async with AsyncRateClient(base_url, concurrency=concurrency) as client:
+        return await client.get_rates(pairs, return_exceptions=return_exceptions)
+
+
+def get_exchange_rates(base_url, pairs, concurrency=20, return_exceptions=False):
+    return asyncio.run(get_exchange_rates_async(base_url, pairs, concurrency, return_exceptions))
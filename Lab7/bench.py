@@ -0,0 +1,185 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from async_rates import get_exchange_rates
+from conversion import convert_coded, convert_many
+from fault_profiles import PROFILES, FaultProfile, apply_profile, fixed
+from loadtest import percentile
+from mock_imposter import Imposter, MockImposter
+from rate_table import NOT_SUPPORTED_STUB, compile_imposter, load_rate_table, pair_stub
+import rates
+from rates import fetch_pair_rate, get_exchange_rate, request_stats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def synthetic_pairs(count):
+    return [(f"C{i:05}", "USD") for i in range(count)]
+
+
+def latency_stub(pairs, latency_ms):
+    config = imposter_with_pairs(pairs)
+    config = apply_profile(config, FaultProfile(latency=fixed(latency_ms)), responses_per_stub=1)
+    return MockImposter(Imposter(config))
+
+
+def bench_async(args):
+    pairs = synthetic_pairs(args.pairs)
+    with latency_stub(args.pairs, args.latency * 1000) as stub:
+        sample = pairs[:args.sequential_sample]
+        start = time.perf_counter()
+        for pair in sample:
+            fetch_pair_rate(stub.base_url, *pair)
+        per_request = (time.perf_counter() - start) / len(sample)
+        print(f"sequential     : {per_request * len(pairs):8.3f} s "
+              f"(estimated from {len(sample)} requests)")
+
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            rates = get_exchange_rates(stub.base_url, pairs, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            assert len(rates) == len(pairs)
+            print(f"concurrency {concurrency:>3}: {elapsed:8.3f} s")
+
+
+def imposter_with_pairs(count):
+    stubs = [pair_stub(from_code, to_code, 1.0) for from_code, to_code in synthetic_pairs(count)]
+    stubs.append(NOT_SUPPORTED_STUB)
+    return {"port": 4545, "protocol": "http", "stubs": stubs}
+
+
+def bench_stubs(args):
+    print(f"{'stubs':>7} {'mode':>8} {'hit, us':>10} {'miss, us':>10}")
+    for count in args.stubs:
+        config = imposter_with_pairs(count)
+        hits = [{"method": "GET", "path": "/rate", "headers": {}, "body": "",
+                 "query": {"from": f"C{random.randrange(count):05}", "to": "USD"}}
+                for _ in range(args.lookups)]
+        miss = {"method": "GET", "path": "/rate", "headers": {}, "body": "",
+                "query": {"from": "XYZ", "to": "ABC"}}
+        for indexed in (False, True):
+            imposter = Imposter(config, indexed=indexed)
+            lookups = hits if indexed else hits[:max(1, args.lookups * 100 // count)]
+            start = time.perf_counter()
+            for request in lookups:
+                imposter.find_stub(request)
+            hit = (time.perf_counter() - start) / len(lookups)
+            start = time.perf_counter()
+            for _ in lookups:
+                imposter.find_stub(miss)
+            missed = (time.perf_counter() - start) / len(lookups)
+            mode = "indexed" if indexed else "linear"
+            print(f"{count:>7} {mode:>8} {hit * 1e6:10.2f} {missed * 1e6:10.2f}")
+
+
+def bench_faults(args):
+    table = load_rate_table(os.path.join(HERE, "rates.csv"))
+    pairs = list(table)
+    config = compile_imposter(table)
+    rates.breakers_enabled = args.breaker
+    print(f"{'profile':>9} {'req/s':>8} {'failed':>7} {'timeouts':>9} {'short-c.':>9} "
+          f"{'amplif.':>8} {'p50, ms':>8} {'p99, ms':>8}")
+    for name in args.profiles:
+        imposter = Imposter(apply_profile(config, PROFILES[name], seed=args.seed))
+        with MockImposter(imposter) as server:
+            request_stats.clear()
+            # Каждый профиль начинает с замкнутого размыкателя
+            rates._breakers.clear()
+            latencies = []
+
+            def call(i):
+                start = time.perf_counter()
+                try:
+                    fetch_pair_rate(server.base_url, *pairs[i % len(pairs)],
+                                    timeout=args.timeout, retries=args.retries, backoff=0.01)
+                except requests.exceptions.RequestException:
+                    return False
+                latencies.append(time.perf_counter() - start)
+                return True
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.workers) as pool:
+                succeeded = sum(pool.map(call, range(args.requests)))
+            elapsed = time.perf_counter() - start
+
+        attempts = request_stats["attempts"]
+        print(f"{name:>9} {args.requests / elapsed:8.1f} "
+              f"{(args.requests - succeeded) / args.requests:7.1%} "
+              f"{request_stats['timeouts'] / attempts:9.1%} "
+              f"{request_stats['short_circuits']:9} "
+              f"{attempts / args.requests:8.2f} "
+              f"{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f}")
+
+
+def bench_convert(args):
+    currencies = ["USD", "RUB", "CHF", "EUR"]
+    rng = np.random.default_rng(args.seed)
+    amounts = rng.uniform(1, 1000, args.rows).round(2)
+    code_ids = rng.integers(0, len(currencies), args.rows)
+    codes = np.array(currencies)[code_ids]
+
+    with MockImposter.from_file(os.path.join(HERE, "imposter.json")) as server:
+        sample = min(args.rows, args.loop_sample)
+        start = time.perf_counter()
+        looped = [amount * get_exchange_rate(server.base_url, code, "EUR") if code != "EUR" else amount
+                  for amount, code in zip(amounts[:sample].tolist(), codes[:sample].tolist())]
+        per_row = (time.perf_counter() - start) / sample
+        print(f"per-row loop   : {per_row * args.rows:8.3f} s (estimated from {sample} rows)")
+
+        start = time.perf_counter()
+        by_code = convert_many(amounts, codes, "EUR", server.base_url)
+        print(f"convert_many   : {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        by_id = convert_coded(amounts, code_ids, currencies, "EUR", server.base_url)
+        print(f"convert_coded  : {time.perf_counter() - start:8.3f} s")
+
+    assert np.allclose(by_code[:sample], looped)
+    assert np.array_equal(by_code, by_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate client benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    async_parser = commands.add_parser("async", help="sequential vs asyncio pair fetching")
+    async_parser.add_argument("--pairs", type=int, default=1000)
+    async_parser.add_argument("--latency", type=float, default=0.02, help="stub latency, s")
+    async_parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100, 200])
+    async_parser.add_argument("--sequential-sample", type=int, default=100)
+    async_parser.set_defaults(func=bench_async)
+
+    stubs_parser = commands.add_parser("stubs", help="linear vs indexed stub matching")
+    stubs_parser.add_argument("--stubs", type=int, nargs="+", default=[100, 1000, 10000])
+    stubs_parser.add_argument("--lookups", type=int, default=2000)
+    stubs_parser.set_defaults(func=bench_stubs)
+
+    faults_parser = commands.add_parser("faults", help="client behaviour under fault profiles")
+    faults_parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES),
+                               default=["healthy", "slow", "flaky", "degraded"])
+    faults_parser.add_argument("--requests", type=int, default=1000)
+    faults_parser.add_argument("--workers", type=int, default=16)
+    faults_parser.add_argument("--timeout", type=float, default=0.25, help="client timeout, s")
+    faults_parser.add_argument("--retries", type=int, default=2)
+    faults_parser.add_argument("--seed", type=int, default=0)
+    faults_parser.add_argument("--breaker", action="store_true", help="enable the circuit breaker")
+    faults_parser.set_defaults(func=bench_faults)
+
+    convert_parser = commands.add_parser("convert", help="per-row vs vectorised conversion")
+    convert_parser.add_argument("--rows", type=int, default=10_000_000)
+    convert_parser.add_argument("--loop-sample", type=int, default=200_000)
+    convert_parser.add_argument("--seed", type=int, default=0)
+    convert_parser.set_defaults(func=bench_convert)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
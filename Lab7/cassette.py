@@ -0,0 +1,180 @@
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Формат файла кассеты:
+#   MAGIC, заголовок <IQ (число записей, смещение индекса),
+#   записи <HHHI (status, len(key), len(content-type), len(body)) + key + content-type + body,
+#   индекс: записи <QQ (хеш ключа, смещение записи), отсортированные по хешу.
+MAGIC = b"RCAS\x01"
+HEADER = struct.Struct("<IQ")
+RECORD = struct.Struct("<HHHI")
+INDEX_ENTRY = struct.Struct("<QQ")
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(method: str, url: str) -> str:
+    """Host-independent key: method, path and sorted query."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {parts.path}?{query}"
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(blake2b(key.lower().encode(), digest_size=8).digest(), "little")
+
+
+def write_cassette(path: str, records: Dict[str, Tuple[int, str, bytes]]):
+    """Write ``{key: (status, content_type, body)}`` atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + HEADER.pack(0, 0))
+            index = []
+            for key, (status, content_type, body) in records.items():
+                index.append((_key_hash(key), f.tell()))
+                key_bytes, type_bytes = key.encode(), content_type.encode()
+                f.write(RECORD.pack(status, len(key_bytes), len(type_bytes), len(body)))
+                f.write(key_bytes + type_bytes + body)
+            index_offset = f.tell()
+            for entry in sorted(index):
+                f.write(INDEX_ENTRY.pack(*entry))
+            f.seek(len(MAGIC))
+            f.write(HEADER.pack(len(index), index_offset))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CassetteReader:
+    """Looks records up by binary search over the mmap-ed index."""
+
+    def __init__(self, path: str, strict: bool = True):
+        self.strict = strict
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a rate cassette")
+        self.count, self._index_offset = HEADER.unpack_from(self._map, len(MAGIC))
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _index_entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + position * INDEX_ENTRY.size)
+
+    def lookup(self, key: str) -> Optional[Tuple[int, str, bytes]]:
+        wanted = _key_hash(key)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        # Просматриваем все записи с тем же хешем
+        for position in range(low, self.count):
+            key_hash, offset = self._index_entry(position)
+            if key_hash != wanted:
+                break
+            status, key_len, type_len, body_len = RECORD.unpack_from(self._map, offset)
+            start = offset + RECORD.size
+            stored_key = self._map[start:start + key_len].decode()
+            if stored_key == key or (not self.strict and stored_key.lower() == key.lower()):
+                start += key_len
+                content_type = self._map[start:start + type_len].decode()
+                start += type_len
+                return status, content_type, self._map[start:start + body_len]
+        return None
+
+
+class CassetteAdapter(BaseAdapter):
+    """requests transport that records to, or replays from, a cassette.
+
+    Replay never touches the network. Strict matching needs the exact
+    method, path and query values; lenient matching ignores their case.
+    """
+
+    def __init__(self, mode: str, records: Optional[dict] = None,
+                 reader: Optional[CassetteReader] = None, transport: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.mode = mode
+        self.records = records if records is not None else {}
+        self.reader = reader
+        self.transport = transport or HTTPAdapter()
+        self.hits = 0
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+        if self.mode == "record":
+            response = self.transport.send(request, **kwargs)
+            self.records[key] = (response.status_code,
+                                 response.headers.get("Content-Type", ""), response.content)
+            return response
+
+        record = self.reader.lookup(key)
+        if record is None:
+            raise CassetteMissError(f"No recorded response for {key}", request=request)
+        self.hits += 1
+        status, content_type, body = record
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type} if content_type else {})
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", strict: bool = True, session=None):
+    """Route a requests session (the rate client's by default) through a cassette.
+
+    ``record`` forwards to the network and saves every response to
+    ``path`` on exit; ``replay`` serves responses from ``path`` only.
+    """
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown cassette mode: {mode}")
+    if session is None:
+        import rates
+        session = rates.session
+
+    reader = CassetteReader(path, strict) if mode == "replay" else None
+    saved = dict(session.adapters)
+    adapter = CassetteAdapter(mode, reader=reader, transport=saved.get("http://"))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        yield adapter
+    finally:
+        session.adapters.clear()
+        for prefix, previous in saved.items():
+            session.mount(prefix, previous)
+        if reader is not None:
+            reader.close()
+        else:
+            write_cassette(path, adapter.records)
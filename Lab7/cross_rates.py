@@ -0,0 +1,104 @@
+import heapq
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from rate_matrix import RateMatrix
+
+
+class DerivedRate(NamedTuple):
+    rate: float
+    path: Tuple[str, ...]
+    as_of: float
+
+    @property
+    def hops(self) -> int:
+        return len(self.path) - 1
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.monotonic() if now is None else now) - self.as_of
+
+
+class CrossRateEngine:
+    """Derives missing currency pairs by triangulating over known rates.
+
+    Known rates form a directed graph. The best path is the one with the
+    fewest conversions; ties go to the path whose oldest leg is the most
+    recent. A derived rate is as old as its oldest leg. Results are
+    memoised per source currency until a rate changes.
+    """
+
+    def __init__(self, max_hops: int = 4, allow_inverse: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_hops < 1:
+            raise ValueError("Max hops must be at least 1")
+        self._max_hops = max_hops
+        self._allow_inverse = allow_inverse
+        self._clock = clock
+        # from -> to -> (rate, as_of)
+        self._edges: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self._trees: Dict[str, Dict[str, DerivedRate]] = {}
+
+    @classmethod
+    def from_matrix(cls, matrix: RateMatrix, **kwargs) -> "CrossRateEngine":
+        engine = cls(**kwargs)
+        as_of = matrix.fetched_at if matrix.fetched_at is not None else engine._clock()
+        for from_currency, to_currency, rate in matrix.pairs():
+            engine.set_rate(from_currency, to_currency, rate, as_of)
+        return engine
+
+    def set_rate(self, from_currency: str, to_currency: str, rate: float,
+                 as_of: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        as_of = self._clock() if as_of is None else as_of
+        self._edges.setdefault(from_currency, {})[to_currency] = (rate, as_of)
+        self._edges.setdefault(to_currency, {})
+        self._trees.clear()
+
+    def derive(self, from_currency: str, to_currency: str) -> Optional[DerivedRate]:
+        tree = self._trees.get(from_currency)
+        if tree is None:
+            tree = self._trees[from_currency] = self._build_tree(from_currency)
+        return tree.get(to_currency)
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        derived = self.derive(from_currency, to_currency)
+        if derived is None:
+            raise ValueError(f"No rate path from {from_currency} to {to_currency}")
+        return derived.rate
+
+    def _neighbours(self, currency):
+        for to_currency, (rate, as_of) in self._edges.get(currency, {}).items():
+            yield to_currency, rate, as_of
+        if self._allow_inverse:
+            for from_currency, row in self._edges.items():
+                if currency in row and from_currency not in self._edges[currency]:
+                    rate, as_of = row[currency]
+                    yield from_currency, 1 / rate, as_of
+
+    def _build_tree(self, source):
+        if source not in self._edges:
+            return {}
+        # Дейкстра по (число пересчётов, -время самого старого курса)
+        tree = {source: DerivedRate(1.0, (source,), float("inf"))}
+        queue = [(0, -float("inf"), source)]
+        settled = set()
+        while queue:
+            hops, neg_as_of, currency = heapq.heappop(queue)
+            if currency in settled:
+                continue
+            settled.add(currency)
+            if hops == self._max_hops:
+                continue
+            current = tree[currency]
+            for to_currency, rate, as_of in self._neighbours(currency):
+                if to_currency in settled:
+                    continue
+                candidate = DerivedRate(current.rate * rate, current.path + (to_currency,),
+                                        min(current.as_of, as_of))
+                best = tree.get(to_currency)
+                if best is None or (candidate.hops, -candidate.as_of) < (best.hops, -best.as_of):
+                    tree[to_currency] = candidate
+                    heapq.heappush(queue, (candidate.hops, -candidate.as_of, to_currency))
+        del tree[source]
+        return tree
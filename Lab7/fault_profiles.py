@@ -0,0 +1,104 @@
+import argparse
+import copy
+import json
+import math
+import random
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# Распределения задержки: функция от random.Random, возвращает миллисекунды
+Latency = Callable[[random.Random], float]
+
+
+def fixed(ms: float) -> Latency:
+    return lambda rng: ms
+
+
+def uniform(low_ms: float, high_ms: float) -> Latency:
+    return lambda rng: rng.uniform(low_ms, high_ms)
+
+
+def exponential(mean_ms: float) -> Latency:
+    return lambda rng: rng.expovariate(1 / mean_ms)
+
+
+def lognormal(median_ms: float, sigma: float) -> Latency:
+    return lambda rng: rng.lognormvariate(math.log(median_ms), sigma)
+
+
+class FaultProfile(NamedTuple):
+    latency: Latency = fixed(0)
+    error_rate: float = 0.0
+    drop_rate: float = 0.0
+    error_status: int = 503
+
+    def sample(self, success: dict, rng: random.Random) -> dict:
+        """Draw one Mountebank response: the success response, an error or a dropped connection."""
+        roll = rng.random()
+        if roll < self.drop_rate:
+            response = {"fault": "CONNECTION_RESET_BY_PEER"}
+        elif roll < self.drop_rate + self.error_rate:
+            response = {"is": {"statusCode": self.error_status,
+                               "headers": {"Content-Type": "application/json"},
+                               "body": {"error": "Service unavailable"}}}
+        else:
+            response = copy.deepcopy(success)
+        wait = round(self.latency(rng))
+        if wait > 0:
+            response["_behaviors"] = {"wait": wait}
+        return response
+
+
+PROFILES = {
+    "healthy": FaultProfile(),
+    "slow": FaultProfile(latency=lognormal(50, 0.5)),
+    "flaky": FaultProfile(latency=exponential(5), error_rate=0.1, drop_rate=0.05),
+    "degraded": FaultProfile(latency=lognormal(150, 1.0), error_rate=0.2, drop_rate=0.1),
+}
+
+
+def apply_profile(config: dict, profile: FaultProfile, stubs: Optional[Iterable[int]] = None,
+                  responses_per_stub: int = 100, seed: int = 0) -> dict:
+    """Return a copy of an imposter definition with the profile baked into its stubs.
+
+    Each targeted stub gets ``responses_per_stub`` responses sampled from the
+    profile. Mountebank and the local runtime cycle through them, so the
+    mix of latencies, errors and drops is reproducible for a given seed.
+    ``stubs`` limits the profile to the given stub positions.
+    """
+    if not 0 <= profile.error_rate <= 1 or not 0 <= profile.drop_rate <= 1:
+        raise ValueError("Error and drop rates must be between 0 and 1")
+    if profile.error_rate + profile.drop_rate > 1:
+        raise ValueError("Error and drop rates cannot add up to more than 1")
+    if responses_per_stub <= 0:
+        raise ValueError("Responses per stub must be positive")
+
+    rng = random.Random(seed)
+    config = copy.deepcopy(config)
+    targets = range(len(config["stubs"])) if stubs is None else stubs
+    for position in targets:
+        stub = config["stubs"][position]
+        success = next((r for r in stub.get("responses", []) if "is" in r), {"is": {}})
+        success = {"is": success["is"]}
+        stub["responses"] = [profile.sample(success, rng) for _ in range(responses_per_stub)]
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake a fault profile into imposter JSON")
+    parser.add_argument("imposter", help="imposter definition")
+    parser.add_argument("--profile", choices=sorted(PROFILES), required=True)
+    parser.add_argument("--responses", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    with open(args.imposter) as f:
+        config = json.load(f)
+    config = apply_profile(config, PROFILES[args.profile],
+                           responses_per_stub=args.responses, seed=args.seed)
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
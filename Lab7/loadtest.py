@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+import aiohttp
+
+from mock_imposter import MockImposter
+from rate_table import load_rate_table
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies = []
+        self.status_codes = Counter()
+        self.errors = Counter()
+        self.started = 0
+        self.late = 0
+
+    def record(self, latency, status=None, error=None):
+        self.latencies.append(latency)
+        if status is not None:
+            self.status_codes[str(status)] += 1
+            if status >= 400:
+                self.errors[f"http_{status}"] += 1
+        if error is not None:
+            self.errors[error] += 1
+
+    def report(self, target, mode, duration, elapsed):
+        completed = len(self.latencies)
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        return {
+            "target": target,
+            "mode": mode,
+            "duration_s": duration,
+            "elapsed_s": round(elapsed, 3),
+            "requests": completed,
+            "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+            "late_starts": self.late,
+            "errors": dict(self.errors),
+            "error_count": sum(self.errors.values()),
+            "status_codes": dict(self.status_codes),
+            "latency_ms": {
+                "p50": round(percentile(latencies_ms, 0.50), 3),
+                "p95": round(percentile(latencies_ms, 0.95), 3),
+                "p99": round(percentile(latencies_ms, 0.99), 3),
+                "max": round(max(latencies_ms), 3) if latencies_ms else None,
+                "mean": round(statistics.fmean(latencies_ms), 3) if latencies_ms else None,
+            },
+        }
+
+
+async def _request(session, base_url, pair, result, timeout):
+    start = time.perf_counter()
+    try:
+        async with session.get(f"{base_url}/rate", params={"from": pair[0], "to": pair[1]},
+                               timeout=timeout) as response:
+            await response.read()
+            result.record(time.perf_counter() - start, status=response.status)
+    except asyncio.TimeoutError:
+        result.record(time.perf_counter() - start, error="timeout")
+    except aiohttp.ClientError:
+        result.record(time.perf_counter() - start, error="connection")
+
+
+async def run_load(base_url, pairs, duration, concurrency=10, rps=None, timeout=5.0, seed=0):
+    """Drive GET /rate for ``duration`` seconds.
+
+    Without ``rps`` it is a closed loop: ``concurrency`` workers send back
+    to back. With ``rps`` requests start on a fixed schedule and at most
+    ``concurrency`` are in flight; starts that had to wait for a free
+    worker are counted as late.
+    """
+    rng = random.Random(seed)
+    result = LoadResult()
+    timeout = aiohttp.ClientTimeout(total=timeout)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        deadline = start + duration
+
+        if rps is None:
+            async def worker():
+                while time.perf_counter() < deadline:
+                    result.started += 1
+                    await _request(session, base_url, rng.choice(pairs), result, timeout)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            slots = asyncio.Semaphore(concurrency)
+            tasks = []
+            interval = 1 / rps
+
+            async def fire(pair):
+                try:
+                    await _request(session, base_url, pair, result, timeout)
+                finally:
+                    slots.release()
+
+            next_start = start
+            while next_start < deadline:
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if slots.locked():
+                    result.late += 1
+                await slots.acquire()
+                result.started += 1
+                tasks.append(asyncio.ensure_future(fire(rng.choice(pairs))))
+                next_start += interval
+            await asyncio.gather(*tasks)
+
+        elapsed = time.perf_counter() - start
+    mode = "closed" if rps is None else f"open@{rps}rps"
+    return result.report(base_url, mode, duration, elapsed)
+
+
+def parse_pairs(value):
+    return [tuple(pair.split(":", 1)) for pair in value.split(",") if pair]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the currency /rate endpoint")
+    parser.add_argument("--url", help="rate service, e.g. http://localhost:4545; "
+                                      "by default imposter.json is served in-process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=10, help="workers / max in flight")
+    parser.add_argument("--rps", type=float, help="target request rate (open loop)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="per-request timeout, s")
+    parser.add_argument("--pairs", type=parse_pairs,
+                        help="FROM:TO,... (default: every pair from rates.csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="loadtest_report.json")
+    args = parser.parse_args()
+
+    if args.concurrency <= 0 or (args.rps is not None and args.rps <= 0):
+        parser.error("concurrency and rps must be positive")
+    pairs = args.pairs or list(load_rate_table(os.path.join(HERE, "rates.csv")))
+
+    def run(base_url):
+        return asyncio.run(run_load(base_url, pairs, args.duration, args.concurrency,
+                                    args.rps, args.timeout, args.seed))
+
+    if args.url:
+        report = run(args.url.rstrip("/"))
+    else:
+        with MockImposter.from_file(os.path.join(HERE, "imposter.json"),
+                                    record_requests=False) as server:
+            report = run(server.base_url)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    latency = report["latency_ms"]
+    print(f"{report['requests']} requests, {report['throughput_rps']} req/s, "
+          f"{report['error_count']} errors, p50 {latency['p50']} ms, "
+          f"p95 {latency['p95']} ms, p99 {latency['p99']} ms -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
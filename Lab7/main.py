@@ -1,11 +1,24 @@
 import pytest
 import requests
 import json
+import os
 from requests.exceptions import HTTPError
 
-@pytest.fixture(scope='module')
-def fxtr_currency_rates():
-    mb_url = "http://localhost:2525"
+from cassette import use_cassette
+from mock_imposter import MockImposter
+from rates import get_exchange_rate
+
+IMPOSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imposter.json")
+REPLAY_URL = "http://rates.replay"
+
+def currency_service():
+    mb_url = os.environ.get("MB_URL")
+    if not mb_url:
+        # Без MB_URL импостер поднимается прямо в процессе, Mountebank не нужен
+        with MockImposter.from_file(IMPOSTER_PATH) as imposter:
+            yield imposter.base_url
+        return
+
     imposter_port = 4545
     
     # Удаляю старый импостер, если он существует
@@ -15,14 +28,14 @@ def fxtr_currency_rates():
         pass
     
     # Создаю новый импостер
-    with open("imposter.json") as f:
+    with open(IMPOSTER_PATH) as f:
         imposter_cfg = json.load(f)
 
     requests.post(f"{mb_url}/imposters",
                   json=imposter_cfg,
                   headers={"Content-Type": "application/json"})
 
-    yield
+    yield f"http://localhost:{imposter_port}"
     
     # Удаляю импостер после завершения тестов
     try:
@@ -30,15 +43,22 @@ def fxtr_currency_rates():
     except:
         pass
 
-def get_exchange_rate(base_url, from_currency, to_currency):
-    response = requests.get(f"{base_url}/rate", params={
-        "from": from_currency,
-        "to": to_currency
-    })
-    response.raise_for_status()
-    return response.json()["rate"]
+@pytest.fixture(scope='module')
+def fxtr_currency_rates():
+    cassette_path = os.environ.get("RATES_CASSETTE")
+    cassette_mode = os.environ.get("RATES_CASSETTE_MODE", "replay")
+    if cassette_path and cassette_mode == "replay":
+        # Ответы берутся из кассеты, сеть не нужна
+        with use_cassette(cassette_path, "replay"):
+            yield REPLAY_URL
+        return
+    if cassette_path:
+        # Запись: тесты идут в настоящий сервис, ответы сохраняются в кассету
+        with use_cassette(cassette_path, cassette_mode):
+            yield from currency_service()
+        return
+    yield from currency_service()
 
-@pytest.mark.usefixtures("fxtr_currency_rates")
 @pytest.mark.parametrize("from_curr,to_curr,expected_rate", [
     ("USD", "EUR", 0.91),
     ("EUR", "USD", 1.10),
@@ -50,14 +70,20 @@ def get_exchange_rate(base_url, from_currency, to_currency):
     ("CHF", "EUR", 1.08),
 ])
 
-def test_currency_rat(from_curr, to_curr, expected_rate):
-    rate = get_exchange_rate("http://localhost:4545", from_curr, to_curr)
+def test_currency_rat(fxtr_currency_rates, from_curr, to_curr, expected_rate):
+    rate = get_exchange_rate(fxtr_currency_rates, from_curr, to_curr)
     assert rate == expected_rate
 
 
-def test_invalid_currency():
+def test_cross_rate(fxtr_currency_rates):
+    # CHF->RUB нет в импостере, курс выводится через EUR
+    rate = get_exchange_rate(fxtr_currency_rates, "CHF", "RUB")
+    assert rate == pytest.approx(1.08 * 95.04)
+
+
+def test_invalid_currency(fxtr_currency_rates):
     with pytest.raises(HTTPError) as ex:
-        get_exchange_rate("http://localhost:4545", "XYZ", "ABC")
+        get_exchange_rate(fxtr_currency_rates, "XYZ", "ABC")
 
     response = ex.value.response
     assert 400 <= response.status_code < 500
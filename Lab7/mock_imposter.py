@@ -0,0 +1,436 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from http import HTTPStatus
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+OPERATORS = {"equals", "deepEquals", "contains", "startsWith", "endsWith", "matches", "exists"}
+LOGICAL = {"not", "or", "and"}
+PREDICATE_OPTIONS = {"caseSensitive"}
+# Поля запроса, по которым строится хеш-индекс стабов
+INDEXED_FIELDS = ("method", "path", "query")
+FAULTS = {"CONNECTION_RESET_BY_PEER", "RANDOM_DATA_THEN_CLOSE"}
+
+
+def _as_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _lower_keys(mapping, case_sensitive):
+    if case_sensitive:
+        return mapping
+    return {key.lower(): value for key, value in mapping.items()}
+
+
+def _field_matches(operator, expected, actual, case_sensitive):
+    if operator == "exists" and not isinstance(expected, dict):
+        return (actual not in (None, "")) == bool(expected)
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            actual = {}
+        actual = _lower_keys(actual, case_sensitive)
+        expected = _lower_keys(expected, case_sensitive)
+        if operator == "deepEquals" and set(expected) != set(actual):
+            return False
+        for key, value in expected.items():
+            if operator != "exists" and key not in actual:
+                return False
+            if not _field_matches(operator, value, actual.get(key), case_sensitive):
+                return False
+        return True
+    if isinstance(actual, list):
+        return any(_field_matches(operator, expected, item, case_sensitive) for item in actual)
+    if actual is None:
+        return False
+
+    expected, actual = _as_text(expected), _as_text(actual)
+    if operator == "matches":
+        return re.search(expected, actual, 0 if case_sensitive else re.IGNORECASE) is not None
+    if not case_sensitive:
+        expected, actual = expected.lower(), actual.lower()
+    if operator in ("equals", "deepEquals"):
+        return expected == actual
+    if operator == "contains":
+        return expected in actual
+    if operator == "startsWith":
+        return actual.startswith(expected)
+    return actual.endswith(expected)
+
+
+def predicate_matches(predicate, request):
+    if "not" in predicate:
+        return not predicate_matches(predicate["not"], request)
+    if "or" in predicate:
+        return any(predicate_matches(p, request) for p in predicate["or"])
+    if "and" in predicate:
+        return all(predicate_matches(p, request) for p in predicate["and"])
+
+    case_sensitive = predicate.get("caseSensitive", False)
+    operator = next(key for key in predicate if key in OPERATORS)
+    for field, expected in predicate[operator].items():
+        actual = request.get(field)
+        if field == "body" and isinstance(expected, dict):
+            try:
+                actual = json.loads(actual or "null")
+            except ValueError:
+                return False
+        if not _field_matches(operator, expected, actual, case_sensitive):
+            return False
+    return True
+
+
+def _check_predicate(predicate):
+    logical = set(predicate) & LOGICAL
+    if logical:
+        (name,) = logical
+        for inner in ([predicate[name]] if name == "not" else predicate[name]):
+            _check_predicate(inner)
+        return
+    operators = set(predicate) & OPERATORS
+    unsupported = set(predicate) - OPERATORS - PREDICATE_OPTIONS
+    if unsupported or len(operators) != 1:
+        raise ValueError(f"Unsupported predicate: {', '.join(sorted(predicate))}")
+
+
+def response_wait(response):
+    """Return the wait behavior of a response in milliseconds."""
+    behaviors = response.get("_behaviors") or {}
+    if isinstance(response.get("behaviors"), list):
+        for behavior in response["behaviors"]:
+            behaviors = dict(behaviors, **behavior)
+    return behaviors.get("wait", 0)
+
+
+def _check_response(response):
+    if "fault" in response:
+        if response["fault"] not in FAULTS:
+            raise ValueError(f"Unsupported fault: {response['fault']}")
+    elif "is" not in response:
+        raise ValueError(f"Unsupported response: {', '.join(sorted(response))}")
+    wait = response_wait(response)
+    if not isinstance(wait, (int, float)) or wait < 0:
+        raise ValueError(f"Unsupported wait behavior: {wait!r}")
+
+
+class Stub:
+    def __init__(self, definition):
+        self.predicates = definition.get("predicates", [])
+        self.responses = definition.get("responses") or [{"is": {}}]
+        for predicate in self.predicates:
+            _check_predicate(predicate)
+        for response in self.responses:
+            _check_response(response)
+        self._next_response = 0
+
+    def matches(self, request):
+        return all(predicate_matches(p, request) for p in self.predicates)
+
+    def next_response(self):
+        # Как в Mountebank: ответы стаба выдаются по кругу
+        response = self.responses[self._next_response]
+        self._next_response = (self._next_response + 1) % len(self.responses)
+        return response
+
+    def index_key(self):
+        """Return (shape, key) if the stub only uses equals on method, path and query.
+
+        The shape says which fields are constrained and how; the key holds the
+        normalised expected values. Stubs that can't be expressed this way
+        return None and are matched by a linear scan instead.
+        """
+        case_sensitive = None
+        method = path = None
+        query = {}
+        for predicate in self.predicates:
+            if set(predicate) - {"equals", "caseSensitive"}:
+                return None
+            equals = predicate["equals"]
+            if set(equals) - set(INDEXED_FIELDS):
+                return None
+            predicate_cs = predicate.get("caseSensitive", False)
+            if case_sensitive is not None and predicate_cs != case_sensitive:
+                return None
+            case_sensitive = predicate_cs
+            for field, value in equals.items():
+                if field == "query":
+                    if not isinstance(value, dict):
+                        return None
+                    for name, expected in value.items():
+                        if isinstance(expected, (list, dict)):
+                            return None
+                        name = name if case_sensitive else name.lower()
+                        if name in query:
+                            return None
+                        query[name] = _as_text(expected)
+                elif isinstance(value, (list, dict)):
+                    return None
+                elif field == "method":
+                    if method is not None:
+                        return None
+                    method = _as_text(value)
+                else:
+                    if path is not None:
+                        return None
+                    path = _as_text(value)
+
+        case_sensitive = bool(case_sensitive)
+        names = tuple(sorted(query))
+        values = (method, path) + tuple(query[name] for name in names)
+        if not case_sensitive:
+            values = tuple(v.lower() if v is not None else None for v in values)
+        shape = (case_sensitive, method is not None, path is not None, names)
+        return shape, tuple(v for v in values if v is not None)
+
+
+class StubIndex:
+    """Hash index over stubs that use plain equals on method, path and query.
+
+    Stubs are grouped by shape (which fields they constrain); each group is a
+    dict from normalised expected values to the first stub position with
+    those values. A lookup probes one dict per shape and scans only the
+    non-indexable stubs that come before the best indexed hit, so
+    first-match order is kept.
+    """
+
+    def __init__(self, stubs):
+        self.stubs = stubs
+        self._shapes = {}
+        self._fallback = []
+        for position, stub in enumerate(stubs):
+            indexed = stub.index_key()
+            if indexed is None:
+                self._fallback.append(position)
+                continue
+            shape, key = indexed
+            self._shapes.setdefault(shape, {}).setdefault(key, position)
+
+    @staticmethod
+    def _request_keys(shape, request):
+        case_sensitive, has_method, has_path, names = shape
+        values = []
+        if has_method:
+            values.append(request.get("method"))
+        if has_path:
+            values.append(request.get("path"))
+        query = _lower_keys(request.get("query") or {}, case_sensitive)
+        for name in names:
+            values.append(query.get(name))
+        if any(value is None for value in values):
+            return []
+        keys = [()]
+        for value in values:
+            options = value if isinstance(value, list) else [value]
+            options = [_as_text(v) if case_sensitive else _as_text(v).lower() for v in options]
+            keys = [key + (option,) for key in keys for option in options]
+        return keys
+
+    def find(self, request) -> Optional[int]:
+        best = None
+        for shape, table in self._shapes.items():
+            for key in self._request_keys(shape, request):
+                position = table.get(key)
+                if position is not None and (best is None or position < best):
+                    best = position
+        for position in self._fallback:
+            if best is not None and position > best:
+                break
+            if self.stubs[position].matches(request):
+                return position
+        return best
+
+
+class Imposter:
+    """Mountebank imposter definition evaluated in-process."""
+
+    def __init__(self, config: dict, indexed: bool = True):
+        if config.get("protocol", "http") != "http":
+            raise ValueError("Only http imposters are supported")
+        self.name = config.get("name")
+        self.port = config.get("port")
+        self.stubs = [Stub(stub) for stub in config.get("stubs", [])]
+        self._index = StubIndex(self.stubs) if indexed else None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "Imposter":
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def replace_stubs(self, stubs):
+        """Swap in a new stub list; requests in flight keep using the old one."""
+        self._index = StubIndex(stubs) if self._index is not None else None
+        self.stubs = stubs
+
+    def find_stub(self, request: dict) -> Optional[Stub]:
+        index = self._index
+        if index is not None:
+            position = index.find(request)
+            return None if position is None else index.stubs[position]
+        for stub in self.stubs:
+            if stub.matches(request):
+                return stub
+        return None
+
+    def resolve(self, request: dict) -> dict:
+        """Return the full response definition, including behaviors and faults."""
+        stub = self.find_stub(request)
+        if stub is None:
+            # Mountebank по умолчанию отвечает 200 с пустым телом
+            return {"is": {"statusCode": 200, "headers": {}, "body": ""}}
+        return stub.next_response()
+
+    def respond(self, request: dict) -> dict:
+        return self.resolve(request).get("is", {})
+
+
+def render_response(response):
+    status = int(response.get("statusCode", 200))
+    headers = dict(response.get("headers") or {})
+    body = response.get("body", "")
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body)
+    payload = body.encode() if isinstance(body, str) else bytes(body)
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    headers["Content-Length"] = str(len(payload))
+    head = f"HTTP/1.1 {status} {reason}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return head.encode("latin-1") + b"\r\n" + payload
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+    length = int(next((v for k, v in headers.items() if k.lower() == "content-length"), 0))
+    body = (await reader.readexactly(length)).decode() if length else ""
+
+    url = urlsplit(target)
+    query = {}
+    for key, value in parse_qsl(url.query, keep_blank_values=True):
+        if key in query:
+            previous = query[key]
+            query[key] = previous + [value] if isinstance(previous, list) else [previous, value]
+        else:
+            query[key] = value
+    return {"method": method, "path": url.path, "query": query,
+            "headers": headers, "body": body}
+
+
+class MockImposter:
+    """Serves an imposter from an asyncio loop in a background thread.
+
+    Binds to an ephemeral port by default, so several instances can run
+    side by side. Usable as a context manager. With ``record_requests``
+    every parsed request is kept in ``requests`` for assertions; it is off
+    by default so load tests and benchmarks run in constant memory.
+    """
+
+    def __init__(self, imposter: Imposter, host: str = "127.0.0.1", port: int = 0,
+                 record_requests: bool = False):
+        self.imposter = imposter
+        self.host = host
+        self.port = port
+        self.record_requests = record_requests
+        self.requests = []
+        self._loop = None
+        self._server = None
+        self._thread = None
+        # handler task -> writer открытых keep-alive соединений
+        self._connections = {}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "MockImposter":
+        return cls(Imposter.from_file(path), **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=1024), self._loop)
+        self._server = future.result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def close():
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def handle_request(self, request):
+        """Return (payload, close); a None payload drops the connection."""
+        if self.record_requests:
+            self.requests.append(request)
+        response = self.imposter.resolve(request)
+        wait = response_wait(response)
+        if wait:
+            await asyncio.sleep(wait / 1000)
+        fault = response.get("fault")
+        if fault == "CONNECTION_RESET_BY_PEER":
+            return None, True
+        if fault == "RANDOM_DATA_THEN_CLOSE":
+            return os.urandom(64), True
+        close = request["headers"].get("Connection", "").lower() == "close"
+        return render_response(response["is"]), close
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                payload, close = await self.handle_request(request)
+                if payload is None:
+                    writer.transport.abort()
+                    break
+                writer.write(payload)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class RateCache:
+    """TTL/LRU cache for exchange rates with stale-while-revalidate.
+
+    A fresh entry is served directly. An entry older than its TTL but still
+    inside the stale window is served as is while a background refresh runs.
+    Anything older than that is fetched synchronously.
+    """
+
+    def __init__(self, fetch: Callable[[str, str, str], float], ttl: float = 60.0,
+                 stale_ttl: float = 300.0, max_size: int = 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        if ttl <= 0:
+            raise ValueError("TTL must be positive")
+        if stale_ttl < 0:
+            raise ValueError("Stale TTL cannot be negative")
+        if max_size <= 0:
+            raise ValueError("Max size must be positive")
+
+        self._fetch = fetch
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_size = max_size
+        self._clock = clock
+        self._pair_ttl: Dict[Tuple[str, str], float] = {}
+        # key -> (rate, fetched_at)
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, float]]" = OrderedDict()
+        self._refreshing: Dict[Tuple[str, str, str], threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0,
+                       "refreshes": 0, "refresh_errors": 0, "evictions": 0}
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def set_ttl(self, from_currency: str, to_currency: str, ttl: float):
+        if ttl <= 0:
+            raise ValueError("TTL must be positive")
+        self._pair_ttl[(from_currency, to_currency)] = ttl
+
+    def ttl_for(self, from_currency: str, to_currency: str) -> float:
+        return self._pair_ttl.get((from_currency, to_currency), self._ttl)
+
+    def get(self, base_url: str, from_currency: str, to_currency: str) -> float:
+        key = (base_url, from_currency, to_currency)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                rate, fetched_at = entry
+                age = now - fetched_at
+                ttl = self.ttl_for(from_currency, to_currency)
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return rate
+                if age <= ttl + self._stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    self._start_refresh(key)
+                    return rate
+            self._stats["misses"] += 1
+
+        rate = self._fetch(base_url, from_currency, to_currency)
+        self._store(key, rate)
+        return rate
+
+    def peek(self, base_url: str, from_currency: str, to_currency: str) -> Optional[float]:
+        """Return the cached rate regardless of its age, without fetching."""
+        with self._lock:
+            entry = self._entries.get((base_url, from_currency, to_currency))
+        return entry[0] if entry is not None else None
+
+    def put(self, base_url: str, from_currency: str, to_currency: str, rate: float):
+        self._store((base_url, from_currency, to_currency), rate)
+
+    def invalidate(self, base_url: str, from_currency: str, to_currency: str):
+        with self._lock:
+            self._entries.pop((base_url, from_currency, to_currency), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for background refreshes that are currently running."""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def _store(self, key, rate):
+        with self._lock:
+            self._entries[key] = (rate, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _start_refresh(self, key):
+        # Вызывается под self._lock: один фоновый запрос на пару
+        if key in self._refreshing:
+            return
+        thread = threading.Thread(target=self._refresh, args=(key,), daemon=True)
+        self._refreshing[key] = thread
+        thread.start()
+
+    def _refresh(self, key):
+        try:
+            rate = self._fetch(*key)
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        else:
+            self._store(key, rate)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
@@ -0,0 +1,49 @@
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class RateMatrix:
+    """Local from -> to -> rate table filled from a single /rates response."""
+
+    def __init__(self, rates: Optional[Dict[str, Dict[str, float]]] = None,
+                 fetched_at: Optional[float] = None):
+        self._rates: Dict[str, Dict[str, float]] = {}
+        self.fetched_at = fetched_at
+        if rates:
+            self.update(rates, fetched_at)
+
+    def __len__(self) -> int:
+        return sum(len(row) for row in self._rates.values())
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        from_currency, to_currency = pair
+        return to_currency in self._rates.get(from_currency, {})
+
+    @property
+    def currencies(self) -> set:
+        codes = set(self._rates)
+        for row in self._rates.values():
+            codes.update(row)
+        return codes
+
+    def get(self, from_currency: str, to_currency: str) -> Optional[float]:
+        return self._rates.get(from_currency, {}).get(to_currency)
+
+    def set(self, from_currency: str, to_currency: str, rate: float):
+        self._rates.setdefault(from_currency, {})[to_currency] = rate
+
+    def update(self, rates: Dict[str, Dict[str, float]], fetched_at: Optional[float] = None):
+        for from_currency, row in rates.items():
+            for to_currency, rate in row.items():
+                self.set(from_currency, to_currency, rate)
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+
+    def pairs(self) -> Iterator[Tuple[str, str, float]]:
+        for from_currency, row in self._rates.items():
+            for to_currency, rate in row.items():
+                yield from_currency, to_currency, rate
+
+    def age(self, now: Optional[float] = None) -> float:
+        if self.fetched_at is None:
+            return float("inf")
+        return (time.monotonic() if now is None else now) - self.fetched_at
@@ -0,0 +1,158 @@
+import argparse
+import csv
+import json
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+from mock_imposter import Imposter, Stub
+
+FIELDS = ["from", "to", "rate"]
+
+Pair = Tuple[str, str]
+
+
+class RateDiff(NamedTuple):
+    added: Dict[Pair, float]
+    changed: Dict[Pair, float]
+    removed: Tuple[Pair, ...]
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+
+def parse_rate_table(lines: Iterable[str]) -> Dict[Pair, float]:
+    """Parse ``from,to,rate`` CSV. Blank lines and ``#`` comments are skipped."""
+    rows = (line for line in lines if line.strip() and not line.lstrip().startswith("#"))
+    reader = csv.reader(rows)
+    header = next(reader, None)
+    if header is None or [h.strip() for h in header] != FIELDS:
+        raise ValueError(f"Rate table must start with header: {','.join(FIELDS)}")
+    rates = {}
+    for row_number, row in enumerate(reader, start=2):
+        if len(row) != 3:
+            raise ValueError(f"Row {row_number}: expected from,to,rate, got {row}")
+        from_currency, to_currency, rate = (value.strip() for value in row)
+        pair = (from_currency, to_currency)
+        if pair in rates:
+            raise ValueError(f"Row {row_number}: duplicate pair {from_currency}->{to_currency}")
+        try:
+            rates[pair] = float(rate)
+        except ValueError:
+            raise ValueError(f"Row {row_number}: invalid rate '{rate}'") from None
+    return rates
+
+
+def load_rate_table(path: str) -> Dict[Pair, float]:
+    with open(path, newline="") as f:
+        return parse_rate_table(f)
+
+
+def diff_rates(old: Dict[Pair, float], new: Dict[Pair, float]) -> RateDiff:
+    added = {pair: rate for pair, rate in new.items() if pair not in old}
+    changed = {pair: rate for pair, rate in new.items() if pair in old and old[pair] != rate}
+    removed = tuple(pair for pair in old if pair not in new)
+    return RateDiff(added, changed, removed)
+
+
+def pair_stub(from_currency: str, to_currency: str, rate: float) -> dict:
+    return {
+        "predicates": [{"equals": {"method": "GET", "path": "/rate",
+                                   "query": {"from": from_currency, "to": to_currency}}}],
+        "responses": [{"is": {"statusCode": 200,
+                              "headers": {"Content-Type": "application/json"},
+                              "body": {"from": from_currency, "to": to_currency, "rate": rate}}}],
+    }
+
+
+def matrix_body(rates: Dict[Pair, float]) -> dict:
+    matrix = {}
+    for (from_currency, to_currency), rate in rates.items():
+        matrix.setdefault(from_currency, {})[to_currency] = rate
+    return {"rates": matrix}
+
+
+def matrix_stub(rates: Dict[Pair, float]) -> dict:
+    return {
+        "predicates": [{"equals": {"method": "GET", "path": "/rates"}}],
+        "responses": [{"is": {"statusCode": 200,
+                              "headers": {"Content-Type": "application/json"},
+                              "body": matrix_body(rates)}}],
+    }
+
+
+NOT_SUPPORTED_STUB = {
+    "responses": [{"is": {"statusCode": 404,
+                          "headers": {"Content-Type": "application/json"},
+                          "body": {"error": "Currency not supported"}}}],
+}
+
+
+def compile_imposter(rates: Dict[Pair, float], port: int = 4545,
+                     name: str = "Currency Mock") -> dict:
+    """Compile a rate table into a Mountebank imposter definition."""
+    stubs = [pair_stub(from_currency, to_currency, rate)
+             for (from_currency, to_currency), rate in rates.items()]
+    stubs.append(matrix_stub(rates))
+    stubs.append(NOT_SUPPORTED_STUB)
+    return {"port": port, "protocol": "http", "name": name, "stubs": stubs}
+
+
+class RateTableImposter(Imposter):
+    """Local imposter built straight from a rate table.
+
+    ``reload`` applies only the difference to the previous table: changed
+    rates are patched into the existing stub responses in place, and the
+    stub index is rebuilt only when pairs are added or removed.
+    """
+
+    def __init__(self, rates: Dict[Pair, float], port: int = 4545, name: str = "Currency Mock"):
+        super().__init__(compile_imposter(rates, port, name))
+        self.rates = dict(rates)
+        self._pair_stubs = dict(zip(rates, self.stubs))
+        self._matrix_stub = self.stubs[len(rates)]
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "RateTableImposter":
+        return cls(load_rate_table(path), **kwargs)
+
+    def reload(self, rates: Dict[Pair, float]) -> RateDiff:
+        diff = diff_rates(self.rates, rates)
+        if not diff:
+            return diff
+
+        for pair, rate in diff.changed.items():
+            self._pair_stubs[pair].responses[0]["is"]["body"]["rate"] = rate
+        if diff.added or diff.removed:
+            removed = {id(self._pair_stubs.pop(pair)) for pair in diff.removed}
+            stubs = [stub for stub in self.stubs if id(stub) not in removed]
+            position = stubs.index(self._matrix_stub)
+            for pair, rate in diff.added.items():
+                stub = Stub(pair_stub(*pair, rate))
+                self._pair_stubs[pair] = stub
+                stubs.insert(position, stub)
+                position += 1
+            self.replace_stubs(stubs)
+
+        self.rates = dict(rates)
+        self._matrix_stub.responses[0]["is"]["body"] = matrix_body(self.rates)
+        return diff
+
+    def reload_csv(self, path: str) -> RateDiff:
+        return self.reload(load_rate_table(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a from,to,rate CSV into imposter JSON")
+    parser.add_argument("table", help="rate table CSV")
+    parser.add_argument("-o", "--output", default="imposter.json")
+    parser.add_argument("--port", type=int, default=4545)
+    parser.add_argument("--name", default="Currency Mock")
+    args = parser.parse_args()
+
+    imposter = compile_imposter(load_rate_table(args.table), args.port, args.name)
+    with open(args.output, "w") as f:
+        json.dump(imposter, f, indent=2)
+    print(f"{args.output}: {len(imposter['stubs'])} stubs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cross_rates import CrossRateEngine
+from rate_cache import RateCache
+from rate_matrix import RateMatrix
+from resilience import CircuitBreaker, CircuitOpenError
+
+MATRIX_TTL = 60.0
+REQUEST_TIMEOUT = 5.0
+
+# Счётчики попыток и ошибок запросов к сервису курсов
+request_stats = Counter()
+_stats_lock = threading.Lock()
+
+# base_url -> RateMatrix, либо None если сервис не отдаёт /rates
+_matrices = {}
+_engines = {}
+# base_url -> time.monotonic() неудачной загрузки /rates (кроме 404); до истечения TTL
+# курсы берутся поштучно через /rate
+_matrix_failures = {}
+# base_url -> Lock: матрицу одного сервиса качает один поток, другие сервисы не ждут
+_matrix_locks = {}
+_matrix_lock = threading.Lock()
+
+# Общая keep-alive сессия; к ней же подключается кассета записи/воспроизведения
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_maxsize=32))
+session.mount("https://", HTTPAdapter(pool_maxsize=32))
+
+# base_url -> CircuitBreaker; размыкатели, как и hedger, по умолчанию выключены
+breakers_enabled = False
+_breakers = {}
+_breakers_lock = threading.Lock()
+# Hedger для дублирования медленных запросов; по умолчанию выключен
+hedger = None
+
+
+def _count(name):
+    with _stats_lock:
+        request_stats[name] += 1
+
+
+def breaker_for(base_url):
+    with _breakers_lock:
+        if base_url not in _breakers:
+            _breakers[base_url] = CircuitBreaker()
+        return _breakers[base_url]
+
+
+def _get(base_url, path, params=None, timeout=REQUEST_TIMEOUT):
+    """GET through the service's circuit breaker and the hedger, each when enabled."""
+    breaker = breaker_for(base_url) if breakers_enabled else None
+    if breaker is not None and not breaker.allow():
+        _count("short_circuits")
+        raise CircuitOpenError(f"Circuit open for {base_url}")
+    try:
+        if hedger is not None:
+            response = hedger.call(session.get, f"{base_url}{path}", params=params, timeout=timeout)
+        else:
+            response = session.get(f"{base_url}{path}", params=params, timeout=timeout)
+    except requests.exceptions.RequestException:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    if breaker is not None:
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    return response
+
+
+def fetch_pair_rate(base_url, from_currency, to_currency, timeout=REQUEST_TIMEOUT,
+                    retries=0, backoff=0.05):
+    """GET /rate, retrying timeouts, dropped connections and 5xx answers."""
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        _count("attempts")
+        try:
+            response = _get(base_url, "/rate", params={
+                "from": from_currency,
+                "to": to_currency
+            }, timeout=timeout)
+        except requests.exceptions.Timeout:
+            _count("timeouts")
+            if last_attempt:
+                raise
+        except requests.exceptions.ConnectionError:
+            _count("connection_errors")
+            if last_attempt:
+                raise
+        else:
+            if response.status_code >= 500:
+                _count("server_errors")
+            if response.status_code < 500 or last_attempt:
+                response.raise_for_status()
+                return response.json()["rate"]
+        _count("retries")
+        time.sleep(backoff * 2 ** attempt)
+
+
+def fetch_rate_matrix(base_url):
+    response = _get(base_url, "/rates")
+    response.raise_for_status()
+    return RateMatrix(response.json()["rates"])
+
+
+def load_rate_matrix(base_url):
+    """Fetch every known rate in one round-trip and prime the pair cache."""
+    matrix = fetch_rate_matrix(base_url)
+    _matrices[base_url] = matrix
+    _engines[base_url] = CrossRateEngine.from_matrix(matrix)
+    for from_currency, to_currency, rate in matrix.pairs():
+        rate_cache.put(base_url, from_currency, to_currency, rate)
+    return matrix
+
+
+def _matrix_lock_for(base_url):
+    with _matrix_lock:
+        if base_url not in _matrix_locks:
+            _matrix_locks[base_url] = threading.Lock()
+        return _matrix_locks[base_url]
+
+
+def _current_matrix(base_url, max_age=MATRIX_TTL):
+    with _matrix_lock_for(base_url):
+        if base_url in _matrices:
+            matrix = _matrices[base_url]
+            if matrix is None or matrix.age() <= max_age:
+                return matrix
+        failed_at = _matrix_failures.get(base_url)
+        if failed_at is not None and time.monotonic() - failed_at <= max_age:
+            return None
+        try:
+            matrix = load_rate_matrix(base_url)
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code == 404:
+                _matrices[base_url] = None
+            else:
+                # 5xx, таймаут или не тот ответ: /rate при этом может работать
+                _matrix_failures[base_url] = time.monotonic()
+            return None
+        _matrix_failures.pop(base_url, None)
+        return matrix
+
+
+def fetch_rate(base_url, from_currency, to_currency):
+    # Матрица не должна быть старше TTL запрошенной пары
+    max_age = min(MATRIX_TTL, rate_cache.ttl_for(from_currency, to_currency))
+    matrix = _current_matrix(base_url, max_age)
+    if matrix is None:
+        return fetch_pair_rate(base_url, from_currency, to_currency)
+    rate = matrix.get(from_currency, to_currency)
+    if rate is not None:
+        return rate
+    derived = _engines[base_url].derive(from_currency, to_currency)
+    if derived is not None:
+        return derived.rate
+    return fetch_pair_rate(base_url, from_currency, to_currency)
+
+
+rate_cache = RateCache(fetch_rate, ttl=MATRIX_TTL, stale_ttl=300.0, max_size=1024)
+
+
+def fallback_rate(base_url, from_currency, to_currency):
+    """Best local answer while the service is unavailable: any cached or derived rate."""
+    rate = rate_cache.peek(base_url, from_currency, to_currency)
+    if rate is None and base_url in _engines:
+        derived = _engines[base_url].derive(from_currency, to_currency)
+        rate = derived.rate if derived is not None else None
+    if rate is not None:
+        _count("fallbacks")
+    return rate
+
+
+def get_exchange_rate(base_url, from_currency, to_currency):
+    try:
+        return rate_cache.get(base_url, from_currency, to_currency)
+    except CircuitOpenError:
+        rate = fallback_rate(base_url, from_currency, to_currency)
+        if rate is None:
+            raise
+        return rate
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding window of calls.
+
+    Opens when at least ``min_calls`` of the last ``window`` calls were made
+    and the failure share reaches ``failure_rate``. After ``reset_timeout``
+    one probe call is let through: success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10,
+                 reset_timeout: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        if not 0 < failure_rate <= 1:
+            raise ValueError("Failure rate must be in (0, 1]")
+        if min_calls <= 0 or window < min_calls:
+            raise ValueError("Window must hold at least min_calls calls")
+        self._failure_rate = failure_rate
+        self._min_calls = min_calls
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._results = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "short_circuits": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, state=self._current_state())
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._stats["short_circuits"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._current_state() == self.HALF_OPEN:
+                self._close()
+            else:
+                self._results.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                self._open()
+                return
+            self._results.append(False)
+            if state == self.CLOSED and len(self._results) >= self._min_calls:
+                failures = self._results.count(False)
+                if failures / len(self._results) >= self._failure_rate:
+                    self._open()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self._stats["opened"] += 1
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._results.clear()
+        self._probe_in_flight = False
+
+
+class Hedger:
+    """Fires a second copy of a slow call after the recent p95 latency.
+
+    Whichever copy finishes first wins; the other one is left to complete
+    in the background. Until ``min_samples`` latencies are known the hedge
+    delay is ``max_delay``.
+    """
+
+    def __init__(self, percentile: float = 0.95, min_delay: float = 0.005,
+                 max_delay: float = 1.0, window: int = 200, min_samples: int = 20,
+                 max_workers: int = 32):
+        if not 0 < percentile < 1:
+            raise ValueError("Percentile must be in (0, 1)")
+        self._percentile = percentile
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, delay=self.delay())
+
+    def delay(self) -> float:
+        latencies = sorted(self._latencies)
+        if len(latencies) < self._min_samples:
+            return self._max_delay
+        p = latencies[min(len(latencies) - 1, int(self._percentile * len(latencies)))]
+        return min(self._max_delay, max(self._min_delay, p))
+
+    def call(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            self._stats["calls"] += 1
+        primary = self._executor.submit(func, *args, **kwargs)
+        done, _ = wait([primary], timeout=self.delay())
+        if done:
+            return self._finish(primary, start)
+
+        with self._lock:
+            self._stats["hedged"] += 1
+        hedge = self._executor.submit(func, *args, **kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    if future is hedge:
+                        with self._lock:
+                            self._stats["hedge_wins"] += 1
+                    return self._finish(future, start)
+
+    def shutdown(self, wait_for_calls: bool = False):
+        self._executor.shutdown(wait=wait_for_calls)
+
+    def _finish(self, future, start):
+        result = future.result()
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
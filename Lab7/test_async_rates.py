@@ -0,0 +1,99 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from async_rates import AsyncRateClient
+
+RATES = {("USD", "EUR"): 0.91, ("EUR", "USD"): 1.10, ("EUR", "RUB"): 95.04}
+
+
+class RateStub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def rate(self, request):
+        pair = (request.query["from"], request.query["to"])
+        self.requests.append(pair)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if pair not in RATES:
+            return web.json_response({"error": "Currency not supported"}, status=404)
+        return web.json_response({"from": pair[0], "to": pair[1], "rate": RATES[pair]})
+
+
+def run_with_stub(stub, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_get("/rate", stub.rate)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_get_rates():
+    stub = RateStub()
+
+    async def scenario(base_url):
+        async with AsyncRateClient(base_url) as client:
+            return await client.get_rates(RATES)
+
+    assert run_with_stub(stub, scenario) == RATES
+
+
+def test_concurrency_limit():
+    stub = RateStub(latency=0.02)
+    pairs = [("EUR", "USD")] + [(f"C{i:03}", "USD") for i in range(30)]
+
+    async def scenario(base_url):
+        async with AsyncRateClient(base_url, concurrency=5) as client:
+            return await client.get_rates(pairs, return_exceptions=True)
+
+    rates = run_with_stub(stub, scenario)
+
+    assert stub.max_in_flight == 5
+    assert rates[("EUR", "USD")] == 1.10
+    assert isinstance(rates[("C000", "USD")], aiohttp.ClientResponseError)
+
+
+def test_duplicate_pairs_share_one_request():
+    stub = RateStub(latency=0.02)
+
+    async def scenario(base_url):
+        async with AsyncRateClient(base_url) as client:
+            results = await asyncio.gather(*(client.get_rate("USD", "EUR") for _ in range(10)))
+            return results, client.requests_sent
+
+    results, requests_sent = run_with_stub(stub, scenario)
+
+    assert results == [0.91] * 10
+    assert requests_sent == 1
+    assert stub.requests == [("USD", "EUR")]
+
+
+def test_unsupported_pair_raises():
+    stub = RateStub()
+
+    async def scenario(base_url):
+        async with AsyncRateClient(base_url) as client:
+            await client.get_rates([("XYZ", "ABC")])
+
+    with pytest.raises(aiohttp.ClientResponseError) as ex:
+        run_with_stub(stub, scenario)
+    assert ex.value.status == 404
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+import requests
+
+import rates
+from cassette import (CassetteMissError, CassetteReader, request_key, use_cassette,
+                      write_cassette)
+from mock_imposter import MockImposter
+
+IMPOSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imposter.json")
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    path = str(tmp_path / "rates.cassette")
+    session = requests.Session()
+    with MockImposter.from_file(IMPOSTER_PATH) as server:
+        with use_cassette(path, "record", session=session):
+            for pair in [("USD", "EUR"), ("EUR", "RUB"), ("XYZ", "ABC")]:
+                session.get(f"{server.base_url}/rate", params={"from": pair[0], "to": pair[1]})
+    return path
+
+
+def test_replay_without_server(cassette_path):
+    session = requests.Session()
+    with use_cassette(cassette_path, session=session) as cassette:
+        ok = session.get("http://offline/rate", params={"to": "RUB", "from": "EUR"})
+        missing = session.get("http://offline/rate", params={"from": "XYZ", "to": "ABC"})
+
+    assert ok.json() == {"from": "EUR", "to": "RUB", "rate": 95.04}
+    assert ok.headers["Content-Type"] == "application/json"
+    assert missing.status_code == 404
+    assert cassette.hits == 2
+
+
+def test_strict_and_lenient_matching(cassette_path):
+    session = requests.Session()
+    with use_cassette(cassette_path, strict=True, session=session):
+        with pytest.raises(CassetteMissError):
+            session.get("http://offline/rate", params={"from": "usd", "to": "eur"})
+
+    with use_cassette(cassette_path, strict=False, session=session):
+        response = session.get("http://offline/rate", params={"from": "usd", "to": "eur"})
+    assert response.json()["rate"] == 0.91
+
+
+def test_session_adapters_are_restored(cassette_path):
+    session = requests.Session()
+    adapter = session.get_adapter("http://")
+    with use_cassette(cassette_path, session=session):
+        assert session.get_adapter("http://") is not adapter
+
+    assert session.get_adapter("http://") is adapter
+
+
+def test_rate_client_replays_recorded_run(tmp_path):
+    path = str(tmp_path / "client.cassette")
+    rates.rate_cache.clear()
+    with MockImposter.from_file(IMPOSTER_PATH) as server:
+        with use_cassette(path, "record"):
+            assert rates.get_exchange_rate(server.base_url, "CHF", "EUR") == 1.08
+    rates.rate_cache.clear()
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+
+    with use_cassette(path, "replay"):
+        assert rates.get_exchange_rate(server.base_url, "CHF", "EUR") == 1.08
+        assert rates.get_exchange_rate(server.base_url, "USD", "RUB") == 86.17
+    rates.rate_cache.clear()
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+
+
+def test_index_lookup_on_many_records(tmp_path):
+    path = str(tmp_path / "big.cassette")
+    records = {request_key("GET", f"http://x/rate?from=C{i:05}&to=USD"): (200, "application/json",
+                                                                         b'{"rate": %d}' % i)
+               for i in range(5000)}
+    write_cassette(path, records)
+
+    reader = CassetteReader(path)
+    try:
+        assert len(reader) == 5000
+        assert reader.lookup("GET /rate?from=C01234&to=USD")[2] == b'{"rate": 1234}'
+        assert reader.lookup("GET /rate?from=C99999&to=USD") is None
+    finally:
+        reader.close()
+
+
+def test_not_a_cassette(tmp_path):
+    path = tmp_path / "imposter.cassette"
+    path.write_bytes(b"{}")
+
+    with pytest.raises(ValueError):
+        CassetteReader(str(path))
+
+
+def test_request_key_ignores_host_and_query_order():
+    assert request_key("get", "http://a:1/rate?to=EUR&from=USD") == "GET /rate?from=USD&to=EUR"
+    assert request_key("GET", "http://b:2/rate?from=USD&to=EUR") == "GET /rate?from=USD&to=EUR"
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from conversion import convert_coded, convert_many
+
+RATES = {("USD", "EUR"): 0.91, ("RUB", "EUR"): 0.01, ("CHF", "EUR"): 1.08}
+
+
+class CountingRates:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, base_url, from_currency, to_currency):
+        self.calls.append((from_currency, to_currency))
+        return RATES[(from_currency, to_currency)]
+
+
+def test_single_source_currency():
+    get_rate = CountingRates()
+
+    converted = convert_many([100, 250.5], "USD", "EUR", "http://mock", get_rate=get_rate)
+
+    assert converted.tolist() == pytest.approx([91.0, 227.955])
+    assert get_rate.calls == [("USD", "EUR")]
+
+
+def test_mixed_source_currencies_resolve_each_rate_once():
+    get_rate = CountingRates()
+    codes = ["USD", "RUB", "EUR", "USD", "CHF", "RUB"]
+
+    converted = convert_many([10, 1000, 5, 20, 10, 500], codes, "EUR", "http://mock", get_rate=get_rate)
+
+    assert converted.tolist() == pytest.approx([9.1, 10.0, 5.0, 18.2, 10.8, 5.0])
+    assert sorted(get_rate.calls) == [("CHF", "EUR"), ("RUB", "EUR"), ("USD", "EUR")]
+
+
+def test_two_dimensional_input():
+    converted = convert_many([[1, 2], [3, 4]], [["USD", "EUR"], ["RUB", "CHF"]], "EUR",
+                             "http://mock", get_rate=CountingRates())
+
+    assert converted.shape == (2, 2)
+    assert converted[1].tolist() == pytest.approx([0.03, 4.32])
+
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        convert_many([1, 2, 3], ["USD", "RUB"], "EUR", "http://mock", get_rate=CountingRates())
+
+
+def test_coded_matches_string_codes():
+    currencies = ["USD", "RUB", "CHF", "EUR", "KZT"]
+    rng = np.random.default_rng(1)
+    amounts = rng.uniform(1, 100, 1000)
+    code_ids = rng.integers(0, 4, 1000)
+    get_rate = CountingRates()
+
+    by_id = convert_coded(amounts, code_ids, currencies, "EUR", "http://mock", get_rate=get_rate)
+    by_code = convert_many(amounts, np.array(currencies)[code_ids], "EUR", "http://mock",
+                           get_rate=CountingRates())
+
+    assert np.array_equal(by_id, by_code)
+    assert ("KZT", "EUR") not in get_rate.calls
@@ -0,0 +1,95 @@
+import pytest
+
+from cross_rates import CrossRateEngine
+from rate_matrix import RateMatrix
+from test_rates import MATRIX
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def engine():
+    return CrossRateEngine.from_matrix(RateMatrix(MATRIX, fetched_at=100.0))
+
+
+def test_direct_pair(engine):
+    derived = engine.derive("EUR", "RUB")
+
+    assert derived.rate == 95.04
+    assert derived.path == ("EUR", "RUB")
+
+
+@pytest.mark.parametrize("from_curr,to_curr,path", [
+    ("CHF", "RUB", ("CHF", "EUR", "RUB")),
+    ("USD", "CHF", ("USD", "EUR", "CHF")),
+    ("RUB", "CHF", ("RUB", "EUR", "CHF")),
+    ("CHF", "USD", ("CHF", "EUR", "USD")),
+])
+def test_triangulated_pair(engine, from_curr, to_curr, path):
+    derived = engine.derive(from_curr, to_curr)
+
+    expected = 1.0
+    for leg_from, leg_to in zip(path, path[1:]):
+        expected *= MATRIX[leg_from][leg_to]
+    assert derived.path == path
+    assert derived.rate == pytest.approx(expected)
+
+
+def test_unreachable_pair(engine):
+    assert engine.derive("XYZ", "ABC") is None
+    assert engine.derive("USD", "XYZ") is None
+    with pytest.raises(ValueError):
+        engine.rate("XYZ", "ABC")
+
+
+def test_derived_rate_is_as_old_as_its_oldest_leg():
+    clock = FakeClock()
+    engine = CrossRateEngine(clock=clock)
+    engine.set_rate("CHF", "EUR", 1.08, as_of=10.0)
+    engine.set_rate("EUR", "RUB", 95.04, as_of=40.0)
+
+    derived = engine.derive("CHF", "RUB")
+    assert derived.as_of == 10.0
+    assert derived.age(now=50.0) == 40.0
+
+
+def test_fresher_path_wins_between_equal_hops():
+    engine = CrossRateEngine()
+    engine.set_rate("CHF", "EUR", 1.08, as_of=10.0)
+    engine.set_rate("EUR", "RUB", 95.04, as_of=10.0)
+    engine.set_rate("CHF", "USD", 1.19, as_of=30.0)
+    engine.set_rate("USD", "RUB", 86.17, as_of=30.0)
+
+    assert engine.derive("CHF", "RUB").path == ("CHF", "USD", "RUB")
+
+
+def test_update_invalidates_memoised_paths(engine):
+    assert engine.derive("CHF", "RUB").path == ("CHF", "EUR", "RUB")
+
+    engine.set_rate("CHF", "RUB", 100.0)
+
+    assert engine.derive("CHF", "RUB").rate == 100.0
+
+
+def test_max_hops(engine):
+    engine.set_rate("RUB", "KZT", 5.5)
+    limited = CrossRateEngine(max_hops=2)
+    for from_curr, to_curr, rate in RateMatrix(MATRIX).pairs():
+        limited.set_rate(from_curr, to_curr, rate)
+    limited.set_rate("RUB", "KZT", 5.5)
+
+    assert engine.derive("CHF", "KZT").path == ("CHF", "EUR", "RUB", "KZT")
+    assert limited.derive("CHF", "KZT") is None
+
+
+def test_inverse_rates():
+    engine = CrossRateEngine(allow_inverse=True)
+    engine.set_rate("USD", "EUR", 0.8)
+
+    assert engine.derive("EUR", "USD").rate == pytest.approx(1.25)
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+import requests
+
+from fault_profiles import FaultProfile, apply_profile, fixed
+from mock_imposter import Imposter, MockImposter
+from rate_table import compile_imposter
+from rates import fetch_pair_rate, request_stats
+
+RATES = {("USD", "EUR"): 0.91, ("EUR", "USD"): 1.10}
+
+
+def serve(stub_responses):
+    config = compile_imposter(RATES)
+    config["stubs"][0]["responses"] = stub_responses
+    return MockImposter(Imposter(config))
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    request_stats.clear()
+
+
+def test_profile_mix_is_reproducible():
+    profile = FaultProfile(error_rate=0.2, drop_rate=0.1)
+
+    first = apply_profile(compile_imposter(RATES), profile, responses_per_stub=1000, seed=7)
+    second = apply_profile(compile_imposter(RATES), profile, responses_per_stub=1000, seed=7)
+
+    responses = first["stubs"][0]["responses"]
+    assert first == second
+    drops = sum("fault" in r for r in responses)
+    errors = sum(r.get("is", {}).get("statusCode") == 503 for r in responses)
+    assert 60 < drops < 140
+    assert 150 < errors < 250
+
+
+def test_profile_only_for_selected_stubs():
+    config = apply_profile(compile_imposter(RATES), FaultProfile(latency=fixed(30)), stubs=[1],
+                           responses_per_stub=5)
+
+    assert len(config["stubs"][0]["responses"]) == 1
+    assert [r["_behaviors"]["wait"] for r in config["stubs"][1]["responses"]] == [30] * 5
+
+
+@pytest.mark.parametrize("profile", [
+    FaultProfile(error_rate=1.5),
+    FaultProfile(error_rate=0.6, drop_rate=0.6),
+])
+def test_invalid_profile(profile):
+    with pytest.raises(ValueError):
+        apply_profile(compile_imposter(RATES), profile)
+
+
+def test_wait_behavior_delays_response():
+    with serve([{"is": {"statusCode": 200, "body": {"rate": 0.91}}, "_behaviors": {"wait": 100}}]) as server:
+        start = time.perf_counter()
+        assert fetch_pair_rate(server.base_url, "USD", "EUR") == 0.91
+        assert time.perf_counter() - start >= 0.1
+
+
+def test_dropped_connection():
+    with serve([{"fault": "CONNECTION_RESET_BY_PEER"}]) as server:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            fetch_pair_rate(server.base_url, "USD", "EUR")
+
+    assert request_stats["connection_errors"] == 1
+
+
+def test_retries_server_errors_and_drops():
+    responses = [{"is": {"statusCode": 503}}, {"fault": "CONNECTION_RESET_BY_PEER"},
+                 {"is": {"statusCode": 200, "body": {"rate": 0.91}}}]
+    with serve(responses) as server:
+        assert fetch_pair_rate(server.base_url, "USD", "EUR", retries=2, backoff=0) == 0.91
+
+    assert request_stats["attempts"] == 3
+    assert request_stats["retries"] == 2
+    assert request_stats["server_errors"] == 1
+    assert request_stats["connection_errors"] == 1
+
+
+def test_timeout_is_retried():
+    responses = [{"is": {"statusCode": 200, "body": {"rate": 0.5}}, "_behaviors": {"wait": 300}},
+                 {"is": {"statusCode": 200, "body": {"rate": 0.91}}}]
+    with serve(responses) as server:
+        assert fetch_pair_rate(server.base_url, "USD", "EUR", timeout=0.1, retries=1, backoff=0) == 0.91
+
+    assert request_stats["timeouts"] == 1
+
+
+def test_last_server_error_is_raised():
+    with serve([{"is": {"statusCode": 503}}]) as server:
+        with pytest.raises(requests.exceptions.HTTPError):
+            fetch_pair_rate(server.base_url, "USD", "EUR", retries=1, backoff=0)
+
+    assert request_stats["attempts"] == 2
+
+
+def test_unsupported_fault():
+    with pytest.raises(ValueError):
+        Imposter({"stubs": [{"responses": [{"fault": "SLOW_LORIS"}]}]})
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import pytest
+
+from loadtest import parse_pairs, percentile, run_load
+from mock_imposter import MockImposter
+
+IMPOSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imposter.json")
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockImposter.from_file(IMPOSTER_PATH) as server:
+        yield server
+
+
+def test_closed_loop_report(server):
+    report = asyncio.run(run_load(server.base_url, [("USD", "EUR"), ("XYZ", "ABC")],
+                                  duration=0.3, concurrency=4))
+
+    assert report["mode"] == "closed"
+    assert report["requests"] > 0
+    assert report["throughput_rps"] > 0
+    assert report["status_codes"]["200"] + report["status_codes"]["404"] == report["requests"]
+    assert report["errors"] == {"http_404": report["status_codes"]["404"]}
+    latency = report["latency_ms"]
+    assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+
+
+def test_open_loop_holds_target_rate(server):
+    report = asyncio.run(run_load(server.base_url, [("EUR", "RUB")], duration=0.5,
+                                  concurrency=8, rps=200))
+
+    assert report["mode"] == "open@200rps"
+    assert 90 <= report["requests"] <= 110
+    assert report["error_count"] == 0
+
+
+def test_connection_errors_are_counted():
+    report = asyncio.run(run_load("http://127.0.0.1:9", [("USD", "EUR")], duration=0.1,
+                                  concurrency=1))
+
+    assert report["errors"]["connection"] == report["requests"]
+
+
+def test_percentile():
+    assert percentile(list(range(1, 101)), 0.95) == 96
+    assert percentile([3.0], 0.99) == 3.0
+
+
+def test_parse_pairs():
+    assert parse_pairs("USD:EUR,CHF:RUB") == [("USD", "EUR"), ("CHF", "RUB")]
@@ -0,0 +1,145 @@
+import os
+
+import pytest
+import requests
+
+from mock_imposter import Imposter, MockImposter
+
+IMPOSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imposter.json")
+
+
+def get_request(path, **query):
+    return {"method": "GET", "path": path, "query": query, "headers": {}, "body": ""}
+
+
+@pytest.fixture(scope="module")
+def imposter():
+    return Imposter.from_file(IMPOSTER_PATH)
+
+
+def test_equals_predicate(imposter):
+    response = imposter.respond(get_request("/rate", **{"from": "EUR", "to": "RUB"}))
+
+    assert response["statusCode"] == 200
+    assert response["body"]["rate"] == 95.04
+
+
+def test_equals_is_case_insensitive_by_default(imposter):
+    response = imposter.respond(get_request("/rate", **{"from": "eur", "to": "rub"}))
+
+    assert response["body"]["rate"] == 95.04
+
+
+def test_extra_query_parameters_are_ignored(imposter):
+    response = imposter.respond(get_request("/rate", **{"from": "USD", "to": "EUR", "v": "2"}))
+
+    assert response["body"]["rate"] == 0.91
+
+
+def test_catch_all_stub(imposter):
+    response = imposter.respond(get_request("/rate", **{"from": "XYZ", "to": "ABC"}))
+
+    assert response["statusCode"] == 404
+    assert response["body"] == {"error": "Currency not supported"}
+
+
+def test_default_response_without_matching_stub():
+    imposter = Imposter({"port": 4545, "protocol": "http", "stubs": []})
+
+    assert imposter.respond(get_request("/rate"))["statusCode"] == 200
+
+
+def test_responses_are_cycled():
+    imposter = Imposter({"stubs": [{"responses": [
+        {"is": {"statusCode": 503}},
+        {"is": {"statusCode": 200}},
+    ]}]})
+
+    codes = [imposter.respond(get_request("/rate"))["statusCode"] for _ in range(3)]
+    assert codes == [503, 200, 503]
+
+
+def test_case_sensitive_predicate():
+    imposter = Imposter({"stubs": [{
+        "predicates": [{"equals": {"path": "/Rate"}, "caseSensitive": True}],
+        "responses": [{"is": {"statusCode": 201}}],
+    }]})
+
+    assert imposter.respond(get_request("/Rate"))["statusCode"] == 201
+    assert imposter.respond(get_request("/rate"))["statusCode"] == 200
+
+
+def test_unsupported_predicate():
+    with pytest.raises(ValueError):
+        Imposter({"stubs": [{"predicates": [{"inject": "function () { return true; }"}]}]})
+
+
+@pytest.mark.parametrize("predicate,request_query,matched", [
+    ({"exists": {"query": {"from": True}}}, {"from": "USD"}, True),
+    ({"exists": {"query": {"from": False}}}, {"from": "USD"}, False),
+    ({"contains": {"query": {"from": "S"}}}, {"from": "usd"}, True),
+    ({"startsWith": {"query": {"from": "EU"}}}, {"from": "EUR"}, True),
+    ({"endsWith": {"query": {"from": "EU"}}}, {"from": "EUR"}, False),
+    ({"matches": {"query": {"from": "^[A-Z]{3}$"}}}, {"from": "usd"}, True),
+    ({"deepEquals": {"query": {"from": "USD"}}}, {"from": "USD", "to": "EUR"}, False),
+    ({"not": {"equals": {"query": {"from": "USD"}}}}, {"from": "EUR"}, True),
+    ({"or": [{"equals": {"query": {"from": "USD"}}},
+             {"equals": {"query": {"from": "EUR"}}}]}, {"from": "EUR"}, True),
+    ({"and": [{"equals": {"query": {"from": "USD"}}},
+              {"equals": {"query": {"to": "EUR"}}}]}, {"from": "USD", "to": "RUB"}, False),
+])
+def test_non_equality_predicates(predicate, request_query, matched):
+    imposter = Imposter({"stubs": [{"predicates": [predicate], "responses": [{"is": {"statusCode": 201}}]}]})
+
+    status = imposter.respond(get_request("/rate", **request_query))["statusCode"]
+    assert (status == 201) == matched
+
+
+def test_index_keeps_first_match_order():
+    imposter = Imposter({"stubs": [
+        {"predicates": [{"equals": {"path": "/rate", "query": {"from": "USD"}}}],
+         "responses": [{"is": {"statusCode": 201}}]},
+        {"predicates": [{"startsWith": {"path": "/ra"}}],
+         "responses": [{"is": {"statusCode": 202}}]},
+        {"predicates": [{"equals": {"method": "GET", "path": "/rate", "query": {"from": "EUR"}}}],
+         "responses": [{"is": {"statusCode": 203}}]},
+        {"predicates": [{"equals": {"path": "/rate"}}],
+         "responses": [{"is": {"statusCode": 204}}]},
+    ]})
+
+    assert imposter.respond(get_request("/rate", **{"from": "USD"}))["statusCode"] == 201
+    assert imposter.respond(get_request("/rate", **{"from": "EUR"}))["statusCode"] == 202
+    assert imposter.respond(get_request("/other"))["statusCode"] == 200
+
+
+def test_index_agrees_with_linear_scan(imposter):
+    linear = Imposter.from_file(IMPOSTER_PATH, indexed=False)
+    requests_to_check = [get_request("/rates"), get_request("/rate"), get_request("/")]
+    for from_curr in ("USD", "eur", "RUB", "CHF", "XYZ"):
+        for to_curr in ("EUR", "usd", "RUB", "CHF", ["EUR", "RUB"]):
+            requests_to_check.append(get_request("/rate", **{"from": from_curr, "to": to_curr}))
+
+    for request in requests_to_check:
+        assert imposter.find_stub(request) is not None
+        assert imposter.stubs.index(imposter.find_stub(request)) == linear.stubs.index(linear.find_stub(request))
+
+
+def test_server_serves_imposter():
+    with MockImposter.from_file(IMPOSTER_PATH, record_requests=True) as server:
+        with requests.Session() as session:
+            ok = session.get(f"{server.base_url}/rate", params={"from": "CHF", "to": "EUR"})
+            missing = session.get(f"{server.base_url}/rate", params={"from": "XYZ", "to": "ABC"})
+
+    assert ok.status_code == 200
+    assert ok.headers["Content-Type"] == "application/json"
+    assert ok.json() == {"from": "CHF", "to": "EUR", "rate": 1.08}
+    assert missing.status_code == 404
+    assert len(server.requests) == 2
+
+
+def test_servers_bind_ephemeral_ports():
+    with MockImposter.from_file(IMPOSTER_PATH) as first, MockImposter.from_file(IMPOSTER_PATH) as second:
+        assert first.port != second.port
+        assert requests.get(f"{second.base_url}/rates").json()["rates"]["CHF"] == {"EUR": 1.08}
+
+    assert second.requests == []
@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from rate_cache import RateCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRates:
+    def __init__(self, rate=1.0):
+        self.rate = rate
+        self.calls = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, base_url, from_currency, to_currency):
+        self.release.wait(5)
+        self.calls.append((from_currency, to_currency))
+        if self.fail:
+            raise ConnectionError("rate service is down")
+        return self.rate
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fetch():
+    return FakeRates(0.91)
+
+
+def test_hit_after_miss(clock, fetch):
+    cache = RateCache(fetch, ttl=10, clock=clock)
+
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+
+    assert fetch.calls == [("USD", "EUR")]
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_lru_eviction(clock, fetch):
+    cache = RateCache(fetch, ttl=10, max_size=2, clock=clock)
+    cache.get("http://mock", "USD", "EUR")
+    cache.get("http://mock", "EUR", "USD")
+    cache.get("http://mock", "USD", "EUR")
+    cache.get("http://mock", "EUR", "RUB")
+
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["size"] == 2
+    cache.get("http://mock", "USD", "EUR")
+    cache.get("http://mock", "EUR", "USD")
+    assert fetch.calls.count(("EUR", "USD")) == 2
+    assert fetch.calls.count(("USD", "EUR")) == 1
+
+
+def test_per_pair_ttl(clock, fetch):
+    cache = RateCache(fetch, ttl=10, stale_ttl=0, clock=clock)
+    cache.set_ttl("RUB", "USD", 1)
+    cache.get("http://mock", "USD", "EUR")
+    cache.get("http://mock", "RUB", "USD")
+
+    clock.now = 5
+    cache.get("http://mock", "USD", "EUR")
+    cache.get("http://mock", "RUB", "USD")
+
+    assert fetch.calls == [("USD", "EUR"), ("RUB", "USD"), ("RUB", "USD")]
+
+
+def test_stale_while_revalidate(clock, fetch):
+    cache = RateCache(fetch, ttl=10, stale_ttl=100, clock=clock)
+    cache.get("http://mock", "USD", "EUR")
+
+    clock.now = 50
+    fetch.rate = 0.92
+    fetch.release.clear()
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+    fetch.release.set()
+    cache.join(5)
+
+    assert cache.get("http://mock", "USD", "EUR") == 0.92
+    stats = cache.stats
+    assert stats["stale_hits"] == 2
+    assert stats["refreshes"] == 1
+    assert len(fetch.calls) == 2
+
+
+def test_failed_refresh_keeps_stale_value(clock, fetch):
+    cache = RateCache(fetch, ttl=10, stale_ttl=100, clock=clock)
+    cache.get("http://mock", "USD", "EUR")
+
+    clock.now = 50
+    fetch.fail = True
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+    cache.join(5)
+
+    assert cache.stats["refresh_errors"] == 1
+    assert cache.get("http://mock", "USD", "EUR") == 0.91
+
+
+def test_expired_entry_is_fetched_synchronously(clock, fetch):
+    cache = RateCache(fetch, ttl=10, stale_ttl=5, clock=clock)
+    cache.get("http://mock", "USD", "EUR")
+
+    clock.now = 20
+    fetch.rate = 0.95
+    assert cache.get("http://mock", "USD", "EUR") == 0.95
+    assert cache.stats["misses"] == 2
+
+
+def test_errors_are_not_cached(clock, fetch):
+    cache = RateCache(fetch, ttl=10, clock=clock)
+    fetch.fail = True
+    with pytest.raises(ConnectionError):
+        cache.get("http://mock", "XYZ", "ABC")
+
+    assert cache.stats["size"] == 0
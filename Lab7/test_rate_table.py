@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+import requests
+
+from mock_imposter import MockImposter
+from rate_table import (RateTableImposter, compile_imposter, diff_rates,
+                        load_rate_table, parse_rate_table)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def rate_request(from_currency, to_currency):
+    return {"method": "GET", "path": "/rate", "headers": {}, "body": "",
+            "query": {"from": from_currency, "to": to_currency}}
+
+
+def test_compiled_table_matches_imposter_json():
+    with open(os.path.join(HERE, "imposter.json")) as f:
+        expected = json.load(f)
+
+    assert compile_imposter(load_rate_table(os.path.join(HERE, "rates.csv"))) == expected
+
+
+def test_parse_skips_comments_and_blank_lines():
+    rates = parse_rate_table(["# test table", "from,to,rate", "", "USD,EUR,0.91"])
+
+    assert rates == {("USD", "EUR"): 0.91}
+
+
+@pytest.mark.parametrize("lines", [
+    ["USD,EUR,0.91"],
+    ["from,to,rate", "USD,EUR"],
+    ["from,to,rate", "USD,EUR,abc"],
+    ["from,to,rate", "USD,EUR,0.91", "USD,EUR,0.92"],
+])
+def test_parse_errors(lines):
+    with pytest.raises(ValueError):
+        parse_rate_table(lines)
+
+
+def test_diff_rates():
+    diff = diff_rates({("USD", "EUR"): 0.91, ("EUR", "USD"): 1.10},
+                      {("USD", "EUR"): 0.92, ("EUR", "RUB"): 95.04})
+
+    assert diff.added == {("EUR", "RUB"): 95.04}
+    assert diff.changed == {("USD", "EUR"): 0.92}
+    assert diff.removed == (("EUR", "USD"),)
+
+
+def test_reload_changed_rate_keeps_stubs():
+    imposter = RateTableImposter.from_csv(os.path.join(HERE, "rates.csv"))
+    stubs = imposter.stubs
+    rates = dict(imposter.rates)
+    rates[("USD", "EUR")] = 0.95
+
+    diff = imposter.reload(rates)
+
+    assert diff.changed == {("USD", "EUR"): 0.95}
+    assert imposter.stubs is stubs
+    assert imposter.respond(rate_request("USD", "EUR"))["body"]["rate"] == 0.95
+    matrix = imposter.respond({"method": "GET", "path": "/rates", "query": {}, "headers": {}, "body": ""})
+    assert matrix["body"]["rates"]["USD"]["EUR"] == 0.95
+
+
+def test_reload_added_and_removed_pairs():
+    imposter = RateTableImposter({("USD", "EUR"): 0.91, ("EUR", "USD"): 1.10})
+
+    imposter.reload({("USD", "EUR"): 0.91, ("CHF", "RUB"): 102.6})
+
+    assert imposter.respond(rate_request("CHF", "RUB"))["body"]["rate"] == 102.6
+    assert imposter.respond(rate_request("EUR", "USD"))["statusCode"] == 404
+    assert len(imposter.stubs) == 4
+
+
+def test_reload_is_visible_to_running_server():
+    imposter = RateTableImposter({("USD", "EUR"): 0.91})
+    with MockImposter(imposter) as server:
+        url = f"{server.base_url}/rate"
+        assert requests.get(url, params={"from": "USD", "to": "EUR"}).json()["rate"] == 0.91
+
+        imposter.reload({("USD", "EUR"): 0.93})
+
+        assert requests.get(url, params={"from": "USD", "to": "EUR"}).json()["rate"] == 0.93
@@ -0,0 +1,163 @@
+import threading
+
+import pytest
+import requests
+
+import rates
+from mock_imposter import Imposter, MockImposter
+from rate_matrix import RateMatrix
+from rate_table import pair_stub
+
+MATRIX = {
+    "USD": {"EUR": 0.91, "RUB": 86.17},
+    "EUR": {"USD": 1.10, "RUB": 95.04, "CHF": 0.93},
+    "RUB": {"USD": 0.012, "EUR": 0.01},
+    "CHF": {"EUR": 1.08},
+}
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(response=response)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def fetch_rate_matrix(base_url):
+        calls.append("/rates")
+        return RateMatrix(MATRIX)
+
+    def fetch_pair_rate(base_url, from_currency, to_currency):
+        calls.append(f"/rate?from={from_currency}&to={to_currency}")
+        raise http_error(404)
+
+    monkeypatch.setattr(rates, "fetch_rate_matrix", fetch_rate_matrix)
+    monkeypatch.setattr(rates, "fetch_pair_rate", fetch_pair_rate)
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+    rates._engines.clear()
+    rates.rate_cache.clear()
+    yield calls
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+    rates._engines.clear()
+    rates.rate_cache.clear()
+
+
+def test_matrix_answers_all_pairs_in_one_request(calls):
+    for from_currency, row in MATRIX.items():
+        for to_currency, expected in row.items():
+            assert rates.get_exchange_rate("http://mock", from_currency, to_currency) == expected
+
+    assert calls == ["/rates"]
+
+
+def test_unknown_pair_falls_back_to_rate_endpoint(calls):
+    with pytest.raises(requests.exceptions.HTTPError):
+        rates.get_exchange_rate("http://mock", "XYZ", "ABC")
+
+    assert calls == ["/rates", "/rate?from=XYZ&to=ABC"]
+
+
+def test_cross_rate_is_derived_locally(calls):
+    assert rates.get_exchange_rate("http://mock", "CHF", "RUB") == pytest.approx(1.08 * 95.04)
+
+    assert calls == ["/rates"]
+
+
+def test_service_without_matrix_endpoint(calls, monkeypatch):
+    def fetch_rate_matrix(base_url):
+        calls.append("/rates")
+        raise http_error(404)
+
+    monkeypatch.setattr(rates, "fetch_rate_matrix", fetch_rate_matrix)
+    monkeypatch.setattr(rates, "fetch_pair_rate", lambda base_url, f, t: calls.append(f + t) or 0.91)
+
+    assert rates.get_exchange_rate("http://mock", "USD", "EUR") == 0.91
+    assert rates.get_exchange_rate("http://mock", "EUR", "USD") == 0.91
+    assert calls == ["/rates", "USDEUR", "EURUSD"]
+
+
+def test_short_pair_ttl_reloads_matrix(calls, monkeypatch):
+    monkeypatch.setattr(rates.rate_cache, "_pair_ttl", {})
+    rates.rate_cache.set_ttl("USD", "EUR", 1.0)
+    assert rates.get_exchange_rate("http://mock", "EUR", "USD") == 1.10
+
+    # Матрица моложе MATRIX_TTL, но старше TTL пары USD/EUR
+    rates._matrices["http://mock"].fetched_at -= 2
+    rates.rate_cache.clear()
+    assert rates.get_exchange_rate("http://mock", "EUR", "USD") == 1.10
+    assert rates.get_exchange_rate("http://mock", "USD", "EUR") == 0.91
+
+    assert calls == ["/rates", "/rates"]
+
+
+def test_slow_matrix_does_not_block_other_services(calls, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def fetch_rate_matrix(base_url):
+        calls.append(base_url)
+        if base_url == "http://slow":
+            started.set()
+            assert release.wait(5)
+        return RateMatrix(MATRIX)
+
+    monkeypatch.setattr(rates, "fetch_rate_matrix", fetch_rate_matrix)
+    slow = threading.Thread(target=rates.get_exchange_rate, args=("http://slow", "USD", "EUR"))
+    slow.start()
+    assert started.wait(5)
+    try:
+        assert rates.get_exchange_rate("http://fast", "USD", "EUR") == 0.91
+    finally:
+        release.set()
+        slow.join()
+
+    assert calls == ["http://slow", "http://fast"]
+
+
+@pytest.fixture
+def pair_service():
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+    rates._engines.clear()
+    rates.rate_cache.clear()
+    # Без стаба /rates: Mountebank отвечает на него 200 с пустым телом
+    config = {"stubs": [pair_stub("USD", "EUR", 0.91), pair_stub("EUR", "USD", 1.10)]}
+    yield config
+    rates._matrices.clear()
+    rates._matrix_failures.clear()
+    rates._engines.clear()
+    rates.rate_cache.clear()
+
+
+@pytest.mark.parametrize("rates_response", [None, {"is": {"statusCode": 500}}])
+def test_broken_matrix_endpoint_falls_back_to_pairs(pair_service, rates_response):
+    if rates_response is not None:
+        pair_service["stubs"].append({"predicates": [{"equals": {"path": "/rates"}}],
+                                      "responses": [rates_response]})
+    with MockImposter(Imposter(pair_service), record_requests=True) as server:
+        assert rates.get_exchange_rate(server.base_url, "USD", "EUR") == 0.91
+        assert rates.get_exchange_rate(server.base_url, "EUR", "USD") == 1.10
+        paths = [request["path"] for request in server.requests]
+
+        # Неудача не постоянная: после TTL матрицу пробуют загрузить снова
+        rates._matrix_failures[server.base_url] -= rates.MATRIX_TTL + 1
+        rates.rate_cache.clear()
+        assert rates.get_exchange_rate(server.base_url, "USD", "EUR") == 0.91
+
+    assert paths == ["/rates", "/rate", "/rate"]
+    assert [request["path"] for request in server.requests][3:] == ["/rates", "/rate"]
+    assert server.base_url not in rates._matrices
+
+
+def test_rate_matrix_lookup():
+    matrix = RateMatrix(MATRIX)
+
+    assert len(matrix) == 8
+    assert ("EUR", "CHF") in matrix
+    assert ("CHF", "RUB") not in matrix
+    assert matrix.get("CHF", "RUB") is None
+    assert matrix.currencies == {"USD", "EUR", "RUB", "CHF"}
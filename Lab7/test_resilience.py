@@ -0,0 +1,163 @@
+import time
+
+import pytest
+
+import rates
+from mock_imposter import Imposter, MockImposter
+from rate_table import compile_imposter, load_rate_table
+from resilience import CircuitBreaker, CircuitOpenError, Hedger
+from test_rate_table import HERE
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clean_rates():
+    def reset():
+        rates._matrices.clear()
+        rates._matrix_failures.clear()
+        rates._engines.clear()
+        rates._breakers.clear()
+        rates.rate_cache.clear()
+        rates.request_stats.clear()
+
+    reset()
+    yield
+    reset()
+
+
+def failing_stubs(wait_ms=0):
+    response = {"is": {"statusCode": 503}}
+    if wait_ms:
+        response["_behaviors"] = {"wait": wait_ms}
+    return Imposter({"stubs": [{"responses": [response]}]}).stubs
+
+
+def test_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, min_calls=4, clock=FakeClock())
+    for _ in range(2):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats["short_circuits"] == 1
+
+
+def test_breaker_half_open_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, window=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 5
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats["opened"] == 2
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"failure_rate": 0},
+    {"failure_rate": 1.5},
+    {"window": 5, "min_calls": 10},
+])
+def test_breaker_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        CircuitBreaker(**kwargs)
+
+
+def test_breakers_are_opt_in(clean_rates):
+    with MockImposter(Imposter({"stubs": [{"responses": [{"is": {"statusCode": 503}}]}]}),
+                      record_requests=True) as server:
+        for _ in range(20):
+            with pytest.raises(rates.requests.exceptions.HTTPError):
+                rates.fetch_pair_rate(server.base_url, "USD", "EUR")
+
+    assert len(server.requests) == 20
+    assert rates._breakers == {}
+
+
+def test_open_circuit_fails_fast_to_derived_rates(clean_rates, monkeypatch):
+    monkeypatch.setattr(rates, "breakers_enabled", True)
+    imposter = Imposter(compile_imposter(load_rate_table(f"{HERE}/rates.csv")))
+    with MockImposter(imposter, record_requests=True) as server:
+        assert rates.get_exchange_rate(server.base_url, "USD", "EUR") == 0.91
+
+        imposter.replace_stubs(failing_stubs(wait_ms=100))
+        slow = []
+        while rates.breaker_for(server.base_url).state == CircuitBreaker.CLOSED:
+            start = time.perf_counter()
+            with pytest.raises(rates.requests.exceptions.HTTPError):
+                rates.fetch_pair_rate(server.base_url, "USD", "EUR")
+            slow.append(time.perf_counter() - start)
+        served = len(server.requests)
+
+        # Кэш и матрица устарели, обновить их нельзя
+        rates.rate_cache.clear()
+        rates._matrices[server.base_url].fetched_at -= rates.MATRIX_TTL + 1
+        fast = []
+        for pair in [("USD", "EUR"), ("CHF", "RUB")] * 10:
+            start = time.perf_counter()
+            rate = rates.get_exchange_rate(server.base_url, *pair)
+            fast.append(time.perf_counter() - start)
+        with pytest.raises(CircuitOpenError):
+            rates.get_exchange_rate(server.base_url, "XYZ", "ABC")
+
+    assert rate == pytest.approx(1.08 * 95.04)
+    assert len(server.requests) == served
+    assert min(slow) >= 0.1
+    assert max(fast) < 0.05
+    assert rates.request_stats["fallbacks"] == 20
+
+
+def test_hedging_cuts_tail_latency(clean_rates, monkeypatch):
+    config = compile_imposter({("USD", "EUR"): 0.91})
+    fast = {"is": {"statusCode": 200, "body": {"rate": 0.91}}}
+    slow = dict(fast, _behaviors={"wait": 400})
+    config["stubs"][0]["responses"] = [slow] + [fast] * 4
+
+    def tail_latency():
+        with MockImposter(Imposter(config)) as server:
+            latencies = []
+            for _ in range(10):
+                start = time.perf_counter()
+                assert rates.fetch_pair_rate(server.base_url, "USD", "EUR") == 0.91
+                latencies.append(time.perf_counter() - start)
+        return max(latencies)
+
+    without_hedging = tail_latency()
+    hedger = Hedger(max_delay=0.05)
+    monkeypatch.setattr(rates, "hedger", hedger)
+    with_hedging = tail_latency()
+    hedger.shutdown()
+
+    assert without_hedging >= 0.4
+    assert with_hedging < 0.2
+    assert hedger.stats["hedge_wins"] >= 1
+
+
+def test_hedger_uses_recent_percentile():
+    hedger = Hedger(percentile=0.5, min_samples=3, min_delay=0, max_delay=1)
+    assert hedger.delay() == 1
+    for _ in range(3):
+        hedger.call(time.sleep, 0.01)
+
+    assert 0.01 <= hedger.delay() < 0.5
+    assert hedger.stats["hedged"] == 0
+    hedger.shutdown()
@@ -1,56 +1,368 @@
+import random
+import threading
+import time
+from contextlib import closing
+
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
 
-BASE_URL = "http://shop2.qatl.ru/shop/" 
+import instrumentation
+from catalog_cache import CatalogCache
+from catalog_snapshot import CatalogDiff, CatalogSnapshot, content_digest, diff_catalogs
+from catalog_stream import iter_json_array
+from visibility import VisibilityStats
 
-def get_all_products():
-    url = f"{BASE_URL}/api/products"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Get all products error: {url}: {e}")
+BASE_URL = "http://shop2.qatl.ru/shop/"
+
+# Каталог скачивается не чаще одного раза за CATALOG_MAX_AGE секунд
+CATALOG_MAX_AGE = 5.0
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Ожидание появления/исчезновения товара в каталоге
+WAIT_TIMEOUT = 10.0
+WAIT_INITIAL_DELAY = 0.05
+WAIT_MAX_DELAY = 1.0
+
+
+class ProductClient:
+    """Shop product API client over one pooled keep-alive session.
+
+    Every request has a (connect, read) timeout. Connections that were
+    never established are retried for all calls; dropped connections,
+    timeouts and 5xx answers only for reads, since the server may already
+    have handled a write and repeating addproduct could create a duplicate. Retries back off
+    exponentially with full jitter. ``base_url`` defaults to the module's
+    BASE_URL at call time, so pointing BASE_URL elsewhere still works;
+    the cached catalog and its snapshot are dropped when it does. Every
+    attempt is timed into ``recorder`` when it is enabled.
+    """
+
+    def __init__(self, base_url=None, timeout=(3.05, 10.0), retries=2, backoff=0.1,
+                 backoff_cap=2.0, pool_size=10, catalog_max_age=CATALOG_MAX_AGE, recorder=None):
+        if retries < 0:
+            raise ValueError("Retries cannot be negative")
+        if pool_size <= 0:
+            raise ValueError("Pool size must be positive")
+        self._base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.recorder = recorder if recorder is not None else instrumentation.recorder
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = CatalogCache(self._catalog_changes, max_age=catalog_max_age)
+        self.snapshot = None
+        # Адрес магазина, с которого скачаны snapshot и кэш
+        self._snapshot_url = None
+        self._cache_url = None
+        # Snapshot, которому сейчас соответствует кэш: кэшу отдаётся только разница с ним
+        self._cache_snapshot = None
+        self.sync_stats = {"downloads": 0, "not_modified": 0, "unchanged": 0, "changed": 0}
+        self._sync_lock = threading.Lock()
+        self.visibility = VisibilityStats()
+
+    @property
+    def base_url(self):
+        return (self._base_url or BASE_URL).rstrip("/")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _sleep_before_retry(self, attempt):
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt)))
+
+    def _send(self, method, path, url, kwargs):
+        if not self.recorder.enabled:
+            return self.session.request(method, url, **kwargs)
+        started_ns = time.perf_counter_ns()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.recorder.record(method, path, type(e).__name__, 0, started_ns)
+            raise
+        if kwargs.get("stream"):
+            # Потоковый ответ ещё не прочитан: берём размер из заголовка
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        self.recorder.record(method, path, response.status_code, size, started_ns)
+        return response
+
+    def request(self, method, path, idempotent=False, **kwargs):
+        url = f"{self.base_url}/api/{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = self._send(method, path, url, kwargs)
+            except requests.exceptions.ConnectTimeout:
+                if last_attempt:
+                    raise
+            except requests.exceptions.Timeout:
+                if last_attempt or not idempotent:
+                    raise
+            except requests.exceptions.ConnectionError as e:
+                if last_attempt or not (idempotent or _not_connected(e)):
+                    raise
+            else:
+                if response.status_code < 500 or last_attempt or not idempotent:
+                    response.raise_for_status()
+                    return response
+            self._sleep_before_retry(attempt)
+
+    def sync_products(self):
+        """Bring the local catalog snapshot up to date and return what changed.
+
+        The download is conditional when the last answer carried an ETag or
+        Last-Modified; a 304, or a 200 with the same body digest, yields an
+        empty diff without parsing the catalog. Returns None on errors.
+        """
+        return self._sync()[1]
+
+    def _sync(self):
+        # Возвращает и snapshot, относительно которого посчитана разница
+        with self._sync_lock:
+            base_url = self.base_url
+            snapshot = self.snapshot if self._snapshot_url == base_url else None
+            headers = snapshot.conditional_headers() if snapshot is not None else {}
+            try:
+                response = self.request("GET", "products", idempotent=True, headers=headers)
+                self.sync_stats["downloads"] += 1
+                if response.status_code == 304 and snapshot is not None:
+                    self.sync_stats["not_modified"] += 1
+                    return snapshot, CatalogDiff.empty()
+                digest = content_digest(response.content)
+                if snapshot is not None and digest == snapshot.digest:
+                    snapshot.etag = response.headers.get("ETag", snapshot.etag)
+                    snapshot.last_modified = response.headers.get("Last-Modified", snapshot.last_modified)
+                    self.sync_stats["unchanged"] += 1
+                    return snapshot, CatalogDiff.empty()
+                products = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Get all products error: {self.base_url}/api/products: {e}")
+                return snapshot, None
+            if not isinstance(products, list):
+                print(f"Get all products error: {self.base_url}/api/products: unexpected body {products!r}")
+                return snapshot, None
+
+            self.snapshot = CatalogSnapshot(products, digest, response.headers.get("ETag"),
+                                            response.headers.get("Last-Modified"))
+            self._snapshot_url = base_url
+            self.sync_stats["changed"] += 1
+            return snapshot, diff_catalogs(snapshot.products if snapshot is not None else {},
+                                           self.snapshot.products)
+
+    def _catalog_changes(self):
+        """CatalogCache fetch: the whole catalog on first load, afterwards only the diff."""
+        cached = self._cache_snapshot
+        base, diff = self._sync()
+        if diff is None:
+            return None
+        snapshot = self.snapshot
+        if snapshot is cached:
+            return CatalogDiff.empty()
+        self._cache_snapshot = snapshot
+        if cached is None:
+            return list(snapshot.products.values())
+        if base is not cached:
+            # Между загрузками кэша каталог синхронизировали отдельно
+            diff = diff_catalogs(cached.products, snapshot.products)
+        return diff
+
+    def _follow_base_url(self):
+        base_url = self.base_url
+        if base_url != self._cache_url:
+            self._cache_snapshot = None
+            self.cache.clear()
+            self._cache_url = base_url
+
+    def get_all_products(self):
+        self._follow_base_url()
+        if not self.cache.refresh():
+            return None
+        return [dict(product) for product in self.snapshot.products.values()]
+
+    def iter_products(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield catalog products one by one while the response downloads.
+
+        Closing the generator early drops the connection instead of
+        reading the rest of the body.
+        """
+        response = self.request("GET", "products", idempotent=True, stream=True)
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size))
+        finally:
+            response.close()
+
+    def find_product(self, product_id=None, alias=None):
+        """Stream the catalog up to the first product with this id or alias."""
+        if (product_id is None) == (alias is None):
+            raise ValueError("Pass either product_id or alias")
+        key, value = ("id", str(product_id)) if alias is None else ("alias", alias)
+        try:
+            with closing(self.iter_products()) as products:
+                for product in products:
+                    if str(product.get(key)) == value:
+                        return product
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Find product error: {self.base_url}/api/products: {e}")
+            return None
+
+        print(f"Find product by {key} {value} error")
+        return None
+
+    def get_product_by_id(self, product_id):
+        self._follow_base_url()
+        product = self.cache.get(product_id)
+        if product is not None:
+            return product
+
+        print(f"Get product by id {product_id} error")
+        return None
+
+    def find_by_alias(self, alias):
+        self._follow_base_url()
+        return self.cache.find_by_alias(alias)
+
+    def find_by_category(self, category_id):
+        self._follow_base_url()
+        return self.cache.find_by_category(category_id)
+
+    def alias_chain(self, alias):
+        self._follow_base_url()
+        return self.cache.alias_chain(alias)
+
+    def next_free_alias(self, alias):
+        self._follow_base_url()
+        return self.cache.next_free_alias(alias)
+
+    def wait_for_product(self, product_id, timeout=WAIT_TIMEOUT, since=None):
+        """Poll the catalog until it lists the product; return it, or None on timeout.
+
+        ``since`` is the time.monotonic() of the write being waited for and
+        defaults to the start of the wait.
+        """
+        if self._wait(product_id, "appear", timeout, since):
+            return self.cache.peek(product_id)
         return None
 
+    def wait_for_absence(self, product_id, timeout=WAIT_TIMEOUT, since=None):
+        """Poll the catalog until it no longer lists the product; False on timeout."""
+        return self._wait(product_id, "disappear", timeout, since)
+
+    def _wait(self, product_id, kind, timeout, since):
+        # Каждый опрос — условная загрузка каталога (sync_products), паузы растут
+        # экспоненциально до WAIT_MAX_DELAY
+        start = time.monotonic()
+        since = start if since is None else since
+        delay = WAIT_INITIAL_DELAY
+        polls = 0
+        self._follow_base_url()
+        while True:
+            polls += 1
+            self.cache.refresh()
+            if (self.cache.peek(product_id) is not None) == (kind == "appear"):
+                self.visibility.record(kind, time.monotonic() - since, polls)
+                return True
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                self.visibility.record_timeout(kind, polls)
+                print(f"Wait for product {product_id} to {kind} timed out after {timeout} s")
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(WAIT_MAX_DELAY, delay * 2)
+
+    def delete_product(self, product_id):
+        self.cache.invalidate(product_id)
+        try:
+            return self.request("GET", "deleteproduct", params={"id": product_id}).json()
+        except requests.exceptions.RequestException as e:
+            print(f"Delete product error: {self.base_url}/api/deleteproduct?id={product_id}: {e}")
+            return None
+
+    def add_product(self, data):
+        try:
+            result = self.request("POST", "addproduct", data=json.dumps(data),
+                                  headers={'Content-Type': 'application/json'}).json()
+        except requests.exceptions.RequestException as e:
+            print(f"Add product erroe {self.base_url}/api/addproduct: {e}\nRequest body: {json.dumps(data)}")
+            return None
+        if isinstance(result, dict) and result.get('id') is not None:
+            self.cache.invalidate(result['id'])
+        return result
+
+    def edit_product(self, data):
+        self.cache.invalidate(data.get('id'))
+        try:
+            return self.request("POST", "editproduct", data=json.dumps(data),
+                                headers={'Content-Type': 'application/json'}).json()
+        except requests.exceptions.RequestException as e:
+            print(f"Edit product error {self.base_url}/api/editproduct: {e}\nRequest body: {json.dumps(data)}")
+            return None
+
+
+def _not_connected(error):
+    # requests заворачивает ошибку urllib3 в MaxRetryError; NewConnectionError значит,
+    # что соединение не открылось и запрос до сервера не дошёл
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+
+client = ProductClient()
+catalog_cache = client.cache
+
+def get_all_products():
+    return client.get_all_products()
+
 def get_product_by_id(product_id):
-    all_products = get_all_products()
-    if all_products:
-        for product in all_products:
-            if product.get('id') == str(product_id):
-                return product
+    return client.get_product_by_id(product_id)
+
+def iter_products():
+    return client.iter_products()
+
+def find_product(product_id=None, alias=None):
+    return client.find_product(product_id, alias)
+
+def sync_products():
+    return client.sync_products()
 
-    print(f"Get product by id {product_id} error")
-    return None
+def find_by_alias(alias):
+    return client.find_by_alias(alias)
+
+def find_by_category(category_id):
+    return client.find_by_category(category_id)
+
+def alias_chain(alias):
+    return client.alias_chain(alias)
+
+def next_free_alias(alias):
+    return client.next_free_alias(alias)
+
+def wait_for_product(product_id, timeout=WAIT_TIMEOUT, since=None):
+    return client.wait_for_product(product_id, timeout, since)
+
+def wait_for_absence(product_id, timeout=WAIT_TIMEOUT, since=None):
+    return client.wait_for_absence(product_id, timeout, since)
 
 def delete_product(product_id):
-    url = f"{BASE_URL}/api/deleteproduct?id={product_id}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Delete product error: {url}: {e}")
-        return None
+    return client.delete_product(product_id)
 
 def add_product(data):
-    url = f"{BASE_URL}/api/addproduct"
-    headers = {'Content-Type': 'application/json'}
-    try:
-        response = requests.post(url, headers=headers, data=json.dumps(data))
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Add product erroe {url}: {e}\nRequest body: {json.dumps(data)}")
-        return None
+    return client.add_product(data)
 
 def edit_product(data):
-    url = f"{BASE_URL}/api/editproduct"
-    headers = {'Content-Type': 'application/json'}
-    try:
-        response = requests.post(url, headers=headers, data=json.dumps(data))
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Edit product error {url}: {e}\nRequest body: {json.dumps(data)}")
-        return None
\ No newline at end of file
+    return client.edit_product(data)
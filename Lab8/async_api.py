@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional
+
+import aiohttp
+
+import api
+import instrumentation
+
+
+class ApiResult(NamedTuple):
+    ok: bool
+    status: Optional[int]
+    data: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+class AsyncProductClient:
+    """asyncio counterpart of api.ProductClient.
+
+    At most ``concurrency`` requests run at once. Every call returns an
+    ApiResult instead of printing the error and returning None. Concurrent
+    id lookups share one catalog download.
+    """
+
+    def __init__(self, base_url=None, concurrency=20, timeout=10.0, recorder=None):
+        if concurrency <= 0:
+            raise ValueError("Concurrency must be positive")
+        self._base_url = base_url
+        self.recorder = recorder if recorder is not None else instrumentation.recorder
+        self._concurrency = concurrency
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+        self._semaphore = None
+        self._catalog_download = None
+
+    @property
+    def base_url(self):
+        return (self._base_url or api.BASE_URL).rstrip("/")
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self._concurrency)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    async def request(self, method, path, **kwargs) -> ApiResult:
+        if self._session is None:
+            raise RuntimeError("Client is not started, use 'async with'")
+        url = f"{self.base_url}/api/{path}"
+        async with self._semaphore:
+            start = time.perf_counter()
+            started_ns = time.perf_counter_ns()
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    # Размер в отчёте — байты тела, как len(response.content) у ProductClient
+                    raw = await response.read()
+                    body = await response.text()
+                    elapsed = time.perf_counter() - start
+                    if self.recorder.enabled:
+                        self.recorder.record(method, path, response.status, len(raw), started_ns)
+                    if response.status >= 400:
+                        return ApiResult(False, response.status, body, f"HTTP {response.status}", elapsed)
+                    try:
+                        data = json.loads(body)
+                    except ValueError:
+                        return ApiResult(False, response.status, body, "Response is not JSON", elapsed)
+                    return ApiResult(True, response.status, data, None, elapsed)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.recorder.enabled:
+                    self.recorder.record(method, path, type(e).__name__, 0, started_ns)
+                return ApiResult(False, None, None, f"{type(e).__name__}: {e}",
+                                 time.perf_counter() - start)
+
+    async def get_all_products(self) -> ApiResult:
+        return await self.request("GET", "products")
+
+    async def get_product_by_id(self, product_id) -> ApiResult:
+        catalog = await self._shared_catalog()
+        if not catalog.ok:
+            return catalog
+        product_id = str(product_id)
+        for product in catalog.data:
+            if product.get("id") == product_id:
+                return catalog._replace(data=product)
+        return ApiResult(False, catalog.status, None, f"Product {product_id} not found", catalog.elapsed)
+
+    async def get_products_by_ids(self, product_ids: Iterable) -> List[ApiResult]:
+        return await asyncio.gather(*(self.get_product_by_id(i) for i in product_ids))
+
+    async def add_product(self, data) -> ApiResult:
+        return await self.request("POST", "addproduct", data=json.dumps(data),
+                                  headers={"Content-Type": "application/json"})
+
+    async def add_products(self, items: Iterable[dict]) -> List[ApiResult]:
+        return await asyncio.gather(*(self.add_product(item) for item in items))
+
+    async def edit_product(self, data) -> ApiResult:
+        return await self.request("POST", "editproduct", data=json.dumps(data),
+                                  headers={"Content-Type": "application/json"})
+
+    async def delete_product(self, product_id) -> ApiResult:
+        return await self.request("GET", "deleteproduct", params={"id": str(product_id)})
+
+    async def delete_products(self, product_ids: Iterable) -> List[ApiResult]:
+        return await asyncio.gather(*(self.delete_product(i) for i in product_ids))
+
+    async def _shared_catalog(self):
+        if self._catalog_download is None:
+            self._catalog_download = asyncio.ensure_future(self.get_all_products())
+            self._catalog_download.add_done_callback(self._forget_catalog)
+        return await asyncio.shield(self._catalog_download)
+
+    def _forget_catalog(self, _):
+        self._catalog_download = None
@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import api
+from async_api import AsyncProductClient
+
+
+class CatalogStub:
+    """Keep-alive HTTP/1.1 server: a fixed catalog on GET, {"status": 1} on POST."""
+
+    def __init__(self, products, latency=0.0):
+        body = json.dumps(products).encode()
+        ids = itertools.count(len(products) + 1)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _reply(self, payload):
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._reply(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._reply(json.dumps({"id": next(ids), "status": 1}).encode())
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 256
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # Потоковый клиент рвёт соединение, найдя нужный товар
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/shop"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def synthetic_products(count):
+    return [{"id": str(i), "category_id": "1", "title": f"Watch {i}", "alias": f"watch-{i}",
+             "content": None, "price": "100", "old_price": None, "status": "1",
+             "keywords": None, "description": None, "hit": "0"} for i in range(1, count + 1)]
+
+
+def timed(call, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<16} mean {statistics.fmean(latencies):7.3f} ms  "
+          f"p50 {statistics.median(latencies):7.3f} ms  p95 {p95:7.3f} ms")
+
+
+def bench_session(args):
+    def run(base_url):
+        url = f"{base_url.rstrip('/')}/api/products"
+        report("requests.get", timed(lambda: requests.get(url).json(), args.repeat))
+        with api.ProductClient(base_url, retries=0) as client:
+            report("pooled session", timed(lambda: client.request("GET", "products").json(),
+                                           args.repeat))
+
+    if args.url:
+        run(args.url)
+    else:
+        with CatalogStub(synthetic_products(args.products)) as stub:
+            run(stub.base_url)
+
+
+def bench_async(args):
+    items = [{"title": f"Watch {i}", "alias": f"watch-{i}"} for i in range(args.products)]
+    with CatalogStub([], latency=args.latency) as stub:
+        with api.ProductClient(stub.base_url, retries=0) as client:
+            start = time.perf_counter()
+            for item in items[:args.sequential_sample]:
+                client.add_product(item)
+            per_call = (time.perf_counter() - start) / args.sequential_sample
+        print(f"sequential     : {per_call * len(items):7.2f} s "
+              f"({len(items) / (per_call * len(items)):7.1f} adds/s, "
+              f"estimated from {args.sequential_sample})")
+
+        for concurrency in args.concurrency:
+            async def seed():
+                async with AsyncProductClient(stub.base_url, concurrency=concurrency) as client:
+                    return await client.add_products(items)
+
+            start = time.perf_counter()
+            results = asyncio.run(seed())
+            elapsed = time.perf_counter() - start
+            assert all(result.ok for result in results)
+            print(f"concurrency {concurrency:>3}: {elapsed:7.2f} s ({len(items) / elapsed:7.1f} adds/s)")
+
+
+def measure(call):
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_stream(args):
+    products = synthetic_products(args.products)
+    middle, last = products[len(products) // 2], products[-1]
+    with CatalogStub(products) as stub:
+        del products
+        with api.ProductClient(stub.base_url, retries=0) as client:
+            def full_lookup(product_id):
+                catalog = client.request("GET", "products").json()
+                return next(p for p in catalog if p["id"] == product_id)
+
+            cases = [
+                ("json() + scan", lambda: full_lookup(last["id"])),
+                ("stream, first", lambda: client.find_product(1)),
+                ("stream, middle", lambda: client.find_product(middle["id"])),
+                ("stream, last", lambda: client.find_product(last["id"])),
+                ("stream, alias", lambda: client.find_product(alias=last["alias"])),
+            ]
+            for name, call in cases:
+                elapsed, peak = measure(call)
+                print(f"{name:<16} {elapsed * 1000:9.1f} ms  peak {peak / 2 ** 20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product API client benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    session_parser = commands.add_parser("session", help="per-call connections vs pooled session")
+    session_parser.add_argument("--url", help="shop base URL (default: local stub)")
+    session_parser.add_argument("--products", type=int, default=50)
+    session_parser.add_argument("--repeat", type=int, default=500)
+    session_parser.set_defaults(func=bench_session)
+
+    async_parser = commands.add_parser("async", help="sequential vs concurrent add_product")
+    async_parser.add_argument("--products", type=int, default=500)
+    async_parser.add_argument("--latency", type=float, default=0.02, help="stub latency, s")
+    async_parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100])
+    async_parser.add_argument("--sequential-sample", type=int, default=50)
+    async_parser.set_defaults(func=bench_async)
+
+    stream_parser = commands.add_parser("stream", help="json() vs streaming lookup by id")
+    stream_parser.add_argument("--products", type=int, default=1_000_000)
+    stream_parser.set_defaults(func=bench_stream)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
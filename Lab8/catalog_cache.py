@@ -0,0 +1,233 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from catalog_snapshot import CatalogDiff
+
+# "watch-1" -> ("watch", 1): сервер разводит совпавшие алиасы суффиксами -0, -1, ...
+_ALIAS_SUFFIX = re.compile(r"^(.*)-(\d+)$")
+
+
+class CatalogCache:
+    """id -> product cache filled from full catalog downloads.
+
+    The catalog is downloaded at most once per ``max_age`` seconds. Ids
+    touched by add/edit/delete are marked pending: the next lookup of a
+    pending id refreshes the catalog once, so server-side changes such as
+    alias rewriting are always seen. So does a lookup of an id the cache
+    doesn't have, since other clients may have added it since the last
+    download. Lookups of other ids are answered from memory.
+
+    Alongside the id map the cache keeps alias and category_id indexes,
+    and groups aliases into collision chains (x, x-0, x-1, ...), so
+    lookups by alias or category never scan the catalog.
+
+    ``fetch`` returns the full catalog, or a CatalogDiff against what it
+    returned last time; a diff is applied in place, touching only the
+    products and index entries it names.
+    """
+
+    def __init__(self, fetch: Callable[[], Union[List[dict], CatalogDiff, None]],
+                 max_age: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_age < 0:
+            raise ValueError("Max age cannot be negative")
+        self._fetch = fetch
+        self.max_age = max_age
+        self._clock = clock
+        self._products = {}
+        self._by_alias: Dict[str, str] = {}
+        # category_id -> {id: None}: упорядоченное множество, удаление за O(1)
+        self._by_category: Dict[str, Dict[str, None]] = {}
+        self._alias_chains: Dict[str, Dict[int, str]] = {}
+        self._pending = set()
+        self._loaded_at = None
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "not_found": 0, "refreshes": 0, "invalidations": 0}
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._products), pending=len(self._pending))
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and self._clock() - self._loaded_at <= self.max_age
+
+    def load(self, products: Iterable[dict]):
+        """Replace the cached catalog with a freshly downloaded one."""
+        with self._lock:
+            self._products = {str(product.get("id")): product for product in products}
+            self._by_alias, self._by_category, self._alias_chains = {}, {}, {}
+            for product_id, product in self._products.items():
+                self._index_alias(product_id, product.get("alias"))
+                self._index_category(product_id, product.get("category_id"))
+            self._pending.clear()
+            self._loaded_at = self._clock()
+
+    def apply(self, diff: CatalogDiff):
+        """Bring the cached catalog up to date with the changes in ``diff``."""
+        with self._lock:
+            for product_id, product in diff.removed.items():
+                product = self._products.pop(product_id, product)
+                self._unindex_alias(product_id, product.get("alias"))
+                self._unindex_category(product_id, product.get("category_id"))
+            for changes in (diff.changed, diff.added):
+                for product_id, product in changes.items():
+                    old = self._products.get(product_id)
+                    self._products[product_id] = product
+                    alias, category_id = product.get("alias"), product.get("category_id")
+                    if old is None:
+                        self._index_alias(product_id, alias)
+                        self._index_category(product_id, category_id)
+                        continue
+                    # Индексы трогаем, только если поле изменилось: порядок категории сохраняется
+                    if old.get("alias") != alias:
+                        self._unindex_alias(product_id, old.get("alias"))
+                        self._index_alias(product_id, alias)
+                    if old.get("category_id") != category_id:
+                        self._unindex_category(product_id, old.get("category_id"))
+                        self._index_category(product_id, category_id)
+            self._pending.clear()
+            self._loaded_at = self._clock()
+
+    def clear(self):
+        """Forget the cached catalog, e.g. when the client switches to another shop."""
+        with self._lock:
+            self._products = {}
+            self._by_alias, self._by_category, self._alias_chains = {}, {}, {}
+            self._pending.clear()
+            self._loaded_at = None
+
+    def refresh(self) -> bool:
+        with self._lock:
+            products = self._fetch()
+            self._stats["refreshes"] += 1
+            if products is None:
+                return False
+            if isinstance(products, CatalogDiff):
+                self.apply(products)
+            else:
+                self.load(products)
+            return True
+
+    def invalidate(self, product_id=None):
+        """Mark one id, or the whole catalog when no id is given, as out of date."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if product_id is None:
+                self._loaded_at = None
+            else:
+                self._pending.add(str(product_id))
+
+    def get(self, product_id) -> Optional[dict]:
+        """Return a copy of the product, or None if the catalog doesn't have it.
+
+        A lookup served without a download counts as a hit, one that had
+        to refresh the catalog as a miss.
+        """
+        product_id = str(product_id)
+        with self._lock:
+            if (not self.is_fresh() or product_id in self._pending
+                    or product_id not in self._products):
+                self._stats["misses"] += 1
+                self.refresh()
+            else:
+                self._stats["hits"] += 1
+            product = self._products.get(product_id)
+            if product is None or product_id in self._pending:
+                self._stats["not_found"] += 1
+                return None
+            return dict(product)
+
+    def peek(self, product_id) -> Optional[dict]:
+        """Return a copy of the cached product without refreshing, whatever its age."""
+        with self._lock:
+            product = self._products.get(str(product_id))
+            return dict(product) if product is not None else None
+
+    def find_by_alias(self, alias: str) -> Optional[dict]:
+        with self._lock:
+            self._ensure_fresh()
+            product_id = self._by_alias.get(alias)
+            if product_id is None or product_id in self._pending:
+                return None
+            return dict(self._products[product_id])
+
+    def find_by_category(self, category_id) -> List[dict]:
+        with self._lock:
+            self._ensure_fresh()
+            return [dict(self._products[product_id])
+                    for product_id in self._by_category.get(str(category_id), ())
+                    if product_id not in self._pending]
+
+    def alias_chain(self, alias: str) -> List[dict]:
+        """Products whose alias is ``alias`` or ``alias-N``, in suffix order."""
+        with self._lock:
+            self._ensure_fresh()
+            chain = self._alias_chains.get(alias, {})
+            return [dict(self._products[chain[suffix]]) for suffix in sorted(chain)
+                    if chain[suffix] not in self._pending]
+
+    def next_free_alias(self, alias: str) -> str:
+        """The alias the server would give the next product titled like ``alias``."""
+        with self._lock:
+            self._ensure_fresh()
+            if alias not in self._by_alias:
+                return alias
+            chain = self._alias_chains[alias]
+            suffix = 0
+            while suffix in chain:
+                suffix += 1
+            return f"{alias}-{suffix}"
+
+    def all(self) -> Optional[List[dict]]:
+        with self._lock:
+            if not self.is_fresh() or self._pending:
+                self.refresh()
+            if self._loaded_at is None:
+                return None
+            return [dict(product) for product in self._products.values()]
+
+    def _ensure_fresh(self):
+        # Алиас или категория pending-товара неизвестны, поэтому любой pending обновляет каталог
+        if not self.is_fresh() or self._pending:
+            self._stats["misses"] += 1
+            self.refresh()
+        else:
+            self._stats["hits"] += 1
+
+    def _index_alias(self, product_id: str, alias: Optional[str]):
+        if alias is None:
+            return
+        self._by_alias[alias] = product_id
+        self._alias_chains.setdefault(alias, {})[-1] = product_id
+        match = _ALIAS_SUFFIX.match(alias)
+        if match:
+            base, suffix = match.group(1), int(match.group(2))
+            self._alias_chains.setdefault(base, {})[suffix] = product_id
+
+    def _unindex_alias(self, product_id: str, alias: Optional[str]):
+        if alias is None or self._by_alias.get(alias) != product_id:
+            return
+        del self._by_alias[alias]
+        links = [(alias, -1)]
+        match = _ALIAS_SUFFIX.match(alias)
+        if match:
+            links.append((match.group(1), int(match.group(2))))
+        for base, suffix in links:
+            chain = self._alias_chains.get(base)
+            if chain is not None and chain.get(suffix) == product_id:
+                del chain[suffix]
+                if not chain:
+                    del self._alias_chains[base]
+
+    def _index_category(self, product_id: str, category_id):
+        self._by_category.setdefault(str(category_id), {})[product_id] = None
+
+    def _unindex_category(self, product_id: str, category_id):
+        ids = self._by_category.get(str(category_id))
+        if ids is not None:
+            ids.pop(product_id, None)
+            if not ids:
+                del self._by_category[str(category_id)]
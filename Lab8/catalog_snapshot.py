@@ -0,0 +1,63 @@
+import hashlib
+from typing import Dict, Iterable, NamedTuple, Optional
+
+
+class CatalogDiff(NamedTuple):
+    """Products keyed by id: new ones, edited ones (new version), deleted ones (last version)."""
+    added: Dict[str, dict]
+    changed: Dict[str, dict]
+    removed: Dict[str, dict]
+
+    @classmethod
+    def empty(cls) -> "CatalogDiff":
+        return cls({}, {}, {})
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
+def diff_catalogs(old: Dict[str, dict], new: Dict[str, dict]) -> CatalogDiff:
+    diff = CatalogDiff.empty()
+    for product_id, product in new.items():
+        previous = old.get(product_id)
+        if previous is None:
+            diff.added[product_id] = product
+        elif previous != product:
+            diff.changed[product_id] = product
+    for product_id, product in old.items():
+        if product_id not in new:
+            diff.removed[product_id] = product
+    return diff
+
+
+def content_digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CatalogSnapshot:
+    """Last downloaded catalog with the validators needed to revalidate it.
+
+    ETag and Last-Modified are sent back as If-None-Match and
+    If-Modified-Since when the server provided them. The body digest lets
+    the client skip parsing and diffing when a full 200 answer is
+    byte-for-byte the same catalog.
+    """
+
+    def __init__(self, products: Iterable[dict], digest: str,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.products = {str(product.get("id")): product for product in products}
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def diff(self, other: "CatalogSnapshot") -> CatalogDiff:
+        return diff_catalogs(self.products, other.products)
@@ -0,0 +1,64 @@
+import codecs
+import itertools
+import json
+import re
+from json.scanner import make_scanner
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_scan_once = make_scanner(json.JSONDecoder())
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array while its bytes arrive.
+
+    Only the unparsed tail of the body is buffered, so memory stays
+    bounded by the chunk size and the largest item. Items are decoded
+    with the stdlib C scanner. Stopping the generator early stops
+    reading ``chunks``.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    buffer, pos = "", 0
+    # "[" -> первый элемент или "]" -> "," или "]" -> элемент -> ...
+    expect = "["
+
+    for chunk in itertools.chain(chunks, [None]):
+        eof = chunk is None
+        buffer = buffer[pos:] + decode(b"" if eof else chunk, final=eof)
+        pos, size = 0, len(buffer)
+
+        while pos < size:
+            if buffer[pos] in " \t\n\r":
+                pos = _WHITESPACE.match(buffer, pos).end()
+                continue
+            if expect == "[":
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+                pos += 1
+                expect = "first"
+                continue
+            if expect == "first" and buffer[pos] == "]":
+                return
+            if expect != "separator":
+                try:
+                    item, end = _scan_once(buffer, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    if eof:
+                        raise ValueError(f"Malformed JSON array item at position {pos} of the buffer")
+                    break
+                # Число в конце буфера может продолжиться в следующем чанке
+                if end == size and not eof:
+                    break
+                yield item
+                pos, expect = end, "separator"
+            match = _SEPARATOR.match(buffer, pos)
+            if match is None:
+                if _WHITESPACE.match(buffer, pos).end() < size:
+                    raise ValueError(f"Expected ',' or ']', got {buffer[pos]!r}")
+                break
+            if match.group(1) == "]":
+                return
+            pos, expect = match.end(), "value"
+
+    raise ValueError("Unexpected end of JSON array")
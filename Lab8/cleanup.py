@@ -0,0 +1,141 @@
+import asyncio
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import api
+from async_api import AsyncProductClient
+
+
+class CleanupJournal:
+    """Append-only file of created ("+<base_url> <id>") and deleted ("-<base_url> <id>") products.
+
+    Ids created but never deleted are pending; after a crashed run they
+    are still in the file and get swept by the next session. Every entry
+    carries the shop it was created on, so a journal shared between runs
+    against different hosts never deletes ids on the wrong one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """Pending (base_url, id) pairs of every host, in creation order."""
+        pending = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    line = line.strip()
+                    base_url, _, product_id = line[1:].rpartition(" ")
+                    if line[:1] == "+":
+                        pending[base_url, product_id] = None
+                    elif line[:1] == "-":
+                        pending.pop((base_url, product_id), None)
+        return list(pending)
+
+    def pending(self, base_url: str) -> List[str]:
+        return [product_id for url, product_id in self.entries() if url == base_url]
+
+    def add(self, base_url: str, product_id):
+        self._append(f"+{base_url} {product_id}")
+
+    def remove(self, base_url: str, product_ids: Iterable):
+        self._append(*(f"-{base_url} {product_id}" for product_id in product_ids))
+
+    def compact(self):
+        """Rewrite the journal with pending entries only, or delete it when none are left."""
+        with self._lock:
+            entries = self.entries()
+            if not entries:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(f"+{base_url} {product_id}\n" for base_url, product_id in entries)
+            os.replace(tmp_path, self.path)
+
+    def _append(self, *lines):
+        if not lines:
+            return
+        with self._lock, open(self.path, "a") as f:
+            f.write("".join(f"{line}\n" for line in lines))
+            f.flush()
+
+
+class SweepReport(NamedTuple):
+    deleted: List[str]
+    missing: List[str]
+    failed: Dict[str, str]
+
+
+class ProductCleaner:
+    """Journals created product ids and deletes them in bulk.
+
+    Every tracked id is journalled first, so nothing is lost if the run
+    dies before ``sweep``. Tests sweep their own ids at teardown; a
+    session-wide sweep only catches what was left behind. Only ids created
+    on ``base_url`` (the module's BASE_URL at call time by default) are
+    swept. Deletes run concurrently with at most ``concurrency`` requests
+    in flight. Products the server no longer has count as cleaned up.
+    """
+
+    def __init__(self, journal_path: str, base_url=None, concurrency: int = 10):
+        self.journal = CleanupJournal(journal_path)
+        self._base_url = base_url
+        self.concurrency = concurrency
+
+    @property
+    def base_url(self):
+        return (self._base_url or api.BASE_URL).rstrip("/")
+
+    def track(self, product_id):
+        if product_id is not None:
+            self.journal.add(self.base_url, product_id)
+
+    def pending(self) -> List[str]:
+        return self.journal.pending(self.base_url)
+
+    def sweep(self, product_ids: Optional[Iterable] = None) -> SweepReport:
+        """Delete the given tracked ids, or every pending one when none are given."""
+        base_url = self.base_url
+        pending = self.journal.pending(base_url)
+        if product_ids is not None:
+            wanted = {str(product_id) for product_id in product_ids}
+            pending = [product_id for product_id in pending if product_id in wanted]
+        product_ids = pending
+        report = SweepReport([], [], {})
+        if product_ids:
+            results = asyncio.run(self._delete(base_url, product_ids))
+            for product_id, result in zip(product_ids, results):
+                if not result.ok:
+                    report.failed[product_id] = result.error
+                elif isinstance(result.data, dict) and result.data.get("status") == 1:
+                    report.deleted.append(product_id)
+                else:
+                    report.missing.append(product_id)
+            cleaned = report.deleted + report.missing
+            self.journal.remove(base_url, cleaned)
+            # Удаления идут мимо api.client: его кэш иначе отдавал бы удалённые товары
+            if base_url == api.client.base_url:
+                for product_id in cleaned:
+                    api.client.cache.invalidate(product_id)
+        self.journal.compact()
+        return report
+
+    async def _delete(self, base_url, product_ids):
+        async with AsyncProductClient(base_url, concurrency=self.concurrency) as client:
+            return await client.delete_products(product_ids)
+
+
+class TrackedIds(list):
+    """List handed to tests; appended ids are registered with the cleaner."""
+
+    def __init__(self, cleaner: ProductCleaner):
+        super().__init__()
+        self._cleaner = cleaner
+
+    def append(self, product_id):
+        super().append(product_id)
+        self._cleaner.track(product_id)
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from instrumentation import format_report, recorder
+
+METRICS_REPORT = "api_metrics.json"
+
+metrics_path_key = pytest.StashKey[str]()
+test_reports_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("api-metrics", "product API latency report")
+    group.addoption("--api-metrics", action="store_true",
+                    help="time every product API call and write a per-test and per-session "
+                         "latency report; API_METRICS=1 does the same")
+    group.addoption("--api-metrics-report", default=METRICS_REPORT, metavar="PATH",
+                    help=f"where to write the report (default: {METRICS_REPORT})")
+
+
+def pytest_configure(config):
+    if config.getoption("--api-metrics") or os.environ.get("API_METRICS"):
+        config.stash[metrics_path_key] = config.getoption("--api-metrics-report")
+        config.stash[test_reports_key] = {}
+        recorder.reset()
+        recorder.enable()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    if metrics_path_key not in item.config.stash:
+        yield
+        return
+    # В отчёт теста попадают и запросы его фикстур, например удаление созданных товаров
+    recorder.start_test()
+    yield
+    rows = recorder.test_summary()
+    if rows:
+        item.config.stash[test_reports_key][item.nodeid] = rows
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # Контроллер pytest-xdist сам тестов не гоняет: сводит гистограммы воркеров
+    metrics = getattr(node, "workeroutput", {}).get("api_metrics")
+    if metrics is not None and metrics_path_key in node.config.stash:
+        recorder.merge(metrics["session"])
+        node.config.stash[test_reports_key].update(metrics["tests"])
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    path = config.stash.get(metrics_path_key, None)
+    if path is None:
+        return
+    if hasattr(config, "workeroutput"):
+        # Отчёт пишет контроллер, воркер только отдаёт ему свои данные
+        config.workeroutput["api_metrics"] = {"session": recorder.export(),
+                                              "tests": config.stash[test_reports_key]}
+        return
+    report = {"session": recorder.session_summary(), "tests": config.stash[test_reports_key]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    path = config.stash.get(metrics_path_key, None)
+    if path is not None:
+        terminalreporter.write_line(format_report(recorder.session_summary(),
+                                                  f"API latency (full report: {path})"))
@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# Верхние границы корзин гистограммы в микросекундах: 16 мкс, 32 мкс, ... ~67 с
+BUCKET_BOUNDS_US = [2 ** i for i in range(4, 27)]
+
+Key = Tuple[str, str, str]
+
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets.
+
+    Count, total, min, max and bytes are exact; percentiles are the upper
+    bound of the bucket the rank falls into.
+    """
+
+    __slots__ = ("buckets", "count", "total_us", "min_us", "max_us", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.min_us = float("inf")
+        self.max_us = 0.0
+        self.bytes = 0
+
+    def add(self, latency_us: float, size: int):
+        self.buckets[bisect_left(BUCKET_BOUNDS_US, latency_us)] += 1
+        self.count += 1
+        self.total_us += latency_us
+        if latency_us < self.min_us:
+            self.min_us = latency_us
+        if latency_us > self.max_us:
+            self.max_us = latency_us
+        self.bytes += size
+
+    def merge(self, state: dict):
+        """Add in the calls of another histogram, given as its ``state()``."""
+        self.buckets = [a + b for a, b in zip(self.buckets, state["buckets"])]
+        self.count += state["count"]
+        self.total_us += state["total_us"]
+        self.min_us = min(self.min_us, state["min_us"])
+        self.max_us = max(self.max_us, state["max_us"])
+        self.bytes += state["bytes"]
+
+    def state(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def percentile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                if index == len(BUCKET_BOUNDS_US):
+                    return self.max_us
+                return min(BUCKET_BOUNDS_US[index], self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "mean_ms": round(self.total_us / self.count / 1000, 3),
+            "min_ms": round(self.min_us / 1000, 3),
+            "p50_ms": round(self.percentile(0.5) / 1000, 3),
+            "p95_ms": round(self.percentile(0.95) / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class RequestRecorder:
+    """Opt-in per-call metrics for the product API clients.
+
+    Calls are grouped by (method, endpoint, status), where status is the
+    HTTP code or the exception name for calls that got no answer. Disabled
+    recorders cost the caller one attribute check. Besides the session
+    totals the recorder keeps a second set of histograms that
+    ``start_test`` resets, for per-test reports.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._session: Dict[Key, Histogram] = {}
+        self._test: Dict[Key, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def record(self, method: str, endpoint: str, status, size: int, started_ns: int):
+        """Record a call that began at time.perf_counter_ns() == ``started_ns``."""
+        latency_us = (time.perf_counter_ns() - started_ns) / 1000
+        key = (method, endpoint, str(status))
+        with self._lock:
+            for histograms in (self._session, self._test):
+                histogram = histograms.get(key)
+                if histogram is None:
+                    histogram = histograms[key] = Histogram()
+                histogram.add(latency_us, size)
+
+    def start_test(self):
+        with self._lock:
+            self._test = {}
+
+    def test_summary(self) -> List[dict]:
+        with self._lock:
+            return _summarize(self._test)
+
+    def session_summary(self) -> List[dict]:
+        with self._lock:
+            return _summarize(self._session)
+
+    def reset(self):
+        with self._lock:
+            self._session, self._test = {}, {}
+
+    def export(self) -> List[list]:
+        """Session histograms as JSON-friendly [method, endpoint, status, state] rows."""
+        with self._lock:
+            return [[*key, histogram.state()] for key, histogram in sorted(self._session.items())]
+
+    def merge(self, exported: List[list]):
+        """Add session histograms exported by another recorder, e.g. a pytest-xdist worker."""
+        with self._lock:
+            for method, endpoint, status, state in exported:
+                key = (method, endpoint, status)
+                histogram = self._session.get(key)
+                if histogram is None:
+                    histogram = self._session[key] = Histogram()
+                histogram.merge(state)
+
+
+def _summarize(histograms: Dict[Key, Histogram]) -> List[dict]:
+    return [dict(method=method, endpoint=endpoint, status=status, **histogram.summary())
+            for (method, endpoint, status), histogram in sorted(histograms.items())]
+
+
+def format_report(rows: List[dict], title: Optional[str] = None) -> str:
+    lines = [title] if title else []
+    lines.append(f"{'method':<6} {'endpoint':<14} {'status':<16} {'calls':>6} {'bytes':>10} "
+                 f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for row in rows:
+        lines.append(f"{row['method']:<6} {row['endpoint']:<14} {row['status']:<16} "
+                     f"{row['count']:>6} {row['bytes']:>10} {row['mean_ms']:>9.3f} "
+                     f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['max_ms']:>9.3f}")
+    return "\n".join(lines)
+
+
+recorder = RequestRecorder()
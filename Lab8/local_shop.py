@@ -0,0 +1,269 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PRODUCT_FIELDS = ("id", "category_id", "title", "alias", "content", "price", "old_price",
+                  "status", "keywords", "description", "hit")
+
+# Так shop2.qatl.ru отвечает на тело, которое не смог обработать
+FATAL_ERROR = "<br />\n<b>Fatal error</b>"
+
+# Товары этих категорий сервер создаёт, но не отдаёт в /api/products
+HIDDEN_CATEGORIES = ("15",)
+
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+_NOT_ALIAS = re.compile(r"[^\w]+")
+
+
+def make_alias(title: str) -> str:
+    return _NOT_ALIAS.sub("-", title.lower()).strip("-")
+
+
+def seed_products(count: int, seed: int = 0, first_id: int = 1) -> List[dict]:
+    rng = random.Random(seed)
+    products = []
+    for product_id in range(first_id, first_id + count):
+        price = rng.randint(100, 100000)
+        products.append({
+            "id": str(product_id), "category_id": str(rng.randint(1, 14)),
+            "title": f"Watch {product_id}", "alias": f"watch-{product_id}",
+            "content": None, "price": str(price),
+            "old_price": str(price + rng.randint(0, 5000)) if rng.random() < 0.3 else None,
+            "status": str(rng.randint(0, 1)), "keywords": None, "description": None,
+            "hit": str(rng.randint(0, 1)),
+        })
+    return products
+
+
+class LocalShop:
+    """In-process stand-in for the shop2.qatl.ru product API.
+
+    Serves /shop/api/products, addproduct, editproduct and deleteproduct
+    on an ephemeral port and copies what the live host does: aliases are
+    built from the title and deduplicated as x, x-0, x-1, ...; unparsable
+    bodies get a 200 with a PHP fatal error page; deleting or editing a
+    missing id answers {"status": 0}; products of HIDDEN_CATEGORIES are
+    stored but never listed. ``latency`` seconds are added to every
+    answer, and added products are listed only ``visibility_delay``
+    seconds later. With ``conditional`` the catalog also carries an ETag and
+    honours If-None-Match, which the live host does not.
+    """
+
+    def __init__(self, products: Iterable[dict] = (), latency: float = 0.0,
+                 conditional: bool = False, visibility_delay: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.visibility_delay = visibility_delay
+        self.conditional = conditional
+        self.products: Dict[str, dict] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self._aliases = set()
+        self._next_id = 1
+        self._version = 0
+        self._body: Optional[bytes] = None
+        # id -> time.monotonic(), когда добавленный товар появится в каталоге
+        self._appearing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        for product in products:
+            self._store(dict(product))
+
+        shop = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                shop._handle(self, "GET")
+
+            def do_POST(self):
+                shop._handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 256
+            daemon_threads = True
+
+        self._server = Server((host, port), Handler)
+        self.base_url = f"http://{host}:{self._server.server_address[1]}/shop/"
+        self._thread = None
+
+    @classmethod
+    def seeded(cls, count: int, seed: int = 0, **kwargs) -> "LocalShop":
+        return cls(seed_products(count, seed), **kwargs)
+
+    def start(self) -> "LocalShop":
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # API
+
+    def add(self, data) -> Tuple[int, object]:
+        if not self._is_valid(data):
+            return 200, FATAL_ERROR
+        with self._lock:
+            product = {field: data.get(field) for field in PRODUCT_FIELDS}
+            product["id"] = str(self._next_id)
+            product["alias"] = self._free_alias(make_alias(str(data.get("title", ""))))
+            self._store(product)
+            if self.visibility_delay:
+                self._appearing[product["id"]] = time.monotonic() + self.visibility_delay
+        return 200, {"id": int(product["id"]), "status": 1}
+
+    def edit(self, data) -> Tuple[int, object]:
+        if not self._is_valid(data):
+            return 200, FATAL_ERROR
+        with self._lock:
+            product_id = str(data.get("id"))
+            product = self.products.get(product_id)
+            if product is None:
+                return 200, {"status": 0}
+            self._aliases.discard(product["alias"])
+            product.update({field: data.get(field) for field in PRODUCT_FIELDS if field != "id"})
+            alias = make_alias(str(data.get("title", "")))
+            product["alias"] = alias if alias not in self._aliases else f"{alias}-{product_id}"
+            self._store(product)
+        return 200, {"status": 1}
+
+    def delete(self, product_id) -> Tuple[int, object]:
+        with self._lock:
+            product = self.products.pop(str(product_id), None)
+            if product is None:
+                return 200, {"status": 0}
+            self._aliases.discard(product["alias"])
+            self._appearing.pop(product["id"], None)
+            self._changed()
+        return 200, {"status": 1}
+
+    def catalog_body(self) -> Tuple[bytes, str]:
+        with self._lock:
+            if self._appearing:
+                now = time.monotonic()
+                appeared = [i for i, visible_at in self._appearing.items() if visible_at <= now]
+                for product_id in appeared:
+                    del self._appearing[product_id]
+                if appeared:
+                    self._changed()
+            if self._body is None:
+                visible = [product for product in self.products.values()
+                           if product["category_id"] not in HIDDEN_CATEGORIES
+                           and product["id"] not in self._appearing]
+                self._body = json.dumps(visible).encode()
+            return self._body, f'"{self._version}"'
+
+    # Internals
+
+    @staticmethod
+    def _is_valid(data) -> bool:
+        if not isinstance(data, dict) or not data:
+            return False
+        return all(data.get(field) is None or _NUMBER.match(str(data[field]))
+                   for field in ("price", "old_price"))
+
+    def _free_alias(self, alias: str) -> str:
+        if alias not in self._aliases:
+            return alias
+        suffix = 0
+        while f"{alias}-{suffix}" in self._aliases:
+            suffix += 1
+        return f"{alias}-{suffix}"
+
+    def _store(self, product: dict):
+        for field in PRODUCT_FIELDS:
+            if product.get(field) is not None:
+                product[field] = str(product[field])
+        self.products[product["id"]] = product
+        self._aliases.add(product["alias"])
+        self._next_id = max(self._next_id, int(product["id"]) + 1)
+        self._changed()
+
+    def _changed(self):
+        self._version += 1
+        self._body = None
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        url = urlparse(handler.path)
+        body = handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+        endpoint = url.path.rstrip("/").rsplit("/api/", 1)[-1] if "/api/" in url.path else ""
+        with self._lock:
+            self.requests.append((method, endpoint))
+        if self.latency:
+            time.sleep(self.latency)
+
+        if method == "GET" and endpoint == "products":
+            payload, etag = self.catalog_body()
+            if self.conditional and handler.headers.get("If-None-Match") == etag:
+                return self._reply(handler, 304, b"", etag=etag)
+            return self._reply(handler, 200, payload, etag=etag if self.conditional else None)
+        if method == "GET" and endpoint == "deleteproduct":
+            status, answer = self.delete(parse_qs(url.query).get("id", [""])[0])
+        elif method == "POST" and endpoint in ("addproduct", "editproduct"):
+            try:
+                data = json.loads(body or b"null")
+            except ValueError:
+                data = None
+            status, answer = self.add(data) if endpoint == "addproduct" else self.edit(data)
+        else:
+            status, answer = 404, "Not Found"
+
+        if isinstance(answer, str):
+            self._reply(handler, status, answer.encode(), "text/html; charset=UTF-8")
+        else:
+            self._reply(handler, status, json.dumps(answer).encode())
+
+    @staticmethod
+    def _reply(handler, status, payload, content_type="application/json", etag=None):
+        handler.send_response(status)
+        if status != 304:
+            handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        if etag is not None:
+            handler.send_header("ETag", etag)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the shop product API")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--products", type=int, default=0, help="size of the seeded catalog")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="added to every answer, s")
+    parser.add_argument("--visibility-delay", type=float, default=0.0,
+                        help="added products are listed this much later, s")
+    parser.add_argument("--conditional", action="store_true", help="send ETag and honour If-None-Match")
+    args = parser.parse_args()
+
+    with LocalShop.seeded(args.products, args.seed, latency=args.latency,
+                          conditional=args.conditional, visibility_delay=args.visibility_delay,
+                          port=args.port) as shop:
+        print(f"Serving {len(shop.products)} products, BASE_URL={shop.base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
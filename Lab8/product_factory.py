@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from async_api import AsyncProductClient
+from local_shop import LocalShop, make_alias
+
+TEMPLATES_FILE = "tests.json"
+
+# Однобуквенные названия берутся из блока иероглифов CJK: make_alias оставляет их как есть,
+# так что у каждого такого товара свой алиас
+ONE_CHAR_TITLES = (0x4E00, 0x9FA5)
+
+
+class ProductFactory:
+    """Seeded generator of unique products built from tests.json templates.
+
+    Every product gets its own id, a title with a running number and the
+    alias the server derives from that title, so products never collide
+    and check_product_details still matches what the server returns.
+    Price, old price, category, status and hit are drawn from ``seed``,
+    so the same seed yields the same products. Returned dicts are fresh
+    copies and can be mutated freely.
+    """
+
+    def __init__(self, templates: Dict[str, dict], seed: int = 0, first_id: int = 100000,
+                 label: str = ""):
+        self.templates = templates
+        self._rng = random.Random(seed)
+        self._numbers = itertools.count(first_id)
+        self.label = label
+
+    @classmethod
+    def from_file(cls, path: str = TEMPLATES_FILE, **kwargs) -> "ProductFactory":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["test_data"], **kwargs)
+
+    def make(self, template: str = "correctProduct", **overrides) -> dict:
+        number = next(self._numbers)
+        rng = self._rng
+        product = dict(self.templates[template])
+        price = rng.randint(1, 100000)
+        title = f"{product['title']} {self.label}{number}"
+        product.update(id=str(number), title=title, alias=make_alias(title),
+                       category_id=str(rng.randint(1, 14)), price=str(price),
+                       old_price=str(price + rng.randint(0, 1000)),
+                       status=str(rng.randint(0, 1)), hit=str(rng.randint(0, 1)))
+        product.update(overrides)
+        return product
+
+    def batch(self, count: int, template: str = "correctProduct") -> List[dict]:
+        return [self.make(template) for _ in range(count)]
+
+    def boundary(self) -> Iterator[Tuple[str, dict]]:
+        """Valid products at the edges of what the schema allows."""
+        yield "category_min", self.make(category_id="1")
+        yield "category_max", self.make(category_id="15")
+        yield "price_zero", self.make(price="0", old_price="0")
+        yield "price_fraction", self.make(price="0.01")
+        yield "price_large", self.make(price="999999999")
+        yield "status_hit_zero", self.make(status="0", hit="0")
+        yield "status_hit_one", self.make(status="1", hit="1")
+        yield "nullable_empty", self.make(content=None, old_price=None, keywords=None,
+                                          description=None)
+        first, last = ONE_CHAR_TITLES
+        one_char = self.make()
+        title = chr(first + int(one_char["id"]) % (last - first + 1))
+        one_char.update(title=title, alias=make_alias(title))
+        yield "title_one_char", one_char
+
+    def invalid(self) -> Iterator[Tuple[str, dict]]:
+        """Products the schema rejects, one broken rule each."""
+        yield "price_negative", self.make(price="-123")
+        yield "price_not_number", self.make(price="abc")
+        yield "category_zero", self.make(category_id="0")
+        yield "category_above_max", self.make(category_id="16")
+        yield "status_two", self.make(status="2")
+        yield "hit_two", self.make(hit="2")
+        yield "title_empty", self.make(title="")
+        yield "price_not_string", self.make(price=123)
+        missing = self.make()
+        del missing["title"]
+        yield "title_missing", missing
+        yield "unknown_field", self.make(color="black")
+
+
+def namespace_templates(templates: Dict[str, dict], label: str) -> Dict[str, dict]:
+    """Copies of the templates with ``label`` appended to every title and alias.
+
+    Test runs that share one server (pytest-xdist workers) use different
+    labels, so their products never land in each other's alias chains.
+    """
+    namespaced = {}
+    for name, template in templates.items():
+        template = dict(template)
+        if "title" in template:
+            template["title"] = f"{template['title']} {label}"
+            template["alias"] = make_alias(template["title"])
+        namespaced[name] = template
+    return namespaced
+
+
+class SeedReport(NamedTuple):
+    created: List[str]
+    failed: List[Tuple[dict, str]]
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        return len(self.created) / self.elapsed if self.elapsed else 0.0
+
+
+def bulk_seed(products: List[dict], base_url: Optional[str] = None, concurrency: int = 50,
+              cleaner=None) -> SeedReport:
+    """Add ``products`` through AsyncProductClient with ``concurrency`` requests in flight.
+
+    Each created id is tracked with ``cleaner`` (a cleanup.ProductCleaner
+    for the same shop) as soon as its add returns, so a seed that dies
+    half way leaves nothing unjournalled.
+    """
+    async def add(client, product):
+        result = await client.add_product(product)
+        product_id = _created_id(result)
+        if product_id is not None and cleaner is not None:
+            cleaner.track(product_id)
+        return result
+
+    async def seed():
+        async with AsyncProductClient(base_url, concurrency=concurrency) as client:
+            return await asyncio.gather(*(add(client, product) for product in products))
+
+    start = time.perf_counter()
+    results = asyncio.run(seed())
+    elapsed = time.perf_counter() - start
+
+    created, failed = [], []
+    for product, result in zip(products, results):
+        product_id = _created_id(result)
+        if product_id is not None:
+            created.append(product_id)
+        else:
+            failed.append((product, result.error or repr(result.data)))
+    return SeedReport(created, failed, elapsed)
+
+
+def _created_id(result) -> Optional[str]:
+    if result.ok and isinstance(result.data, dict) and result.data.get("status") == 1:
+        return str(result.data.get("id"))
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generated products into the shop API")
+    parser.add_argument("--url", help="shop base URL (default: local stand-in)")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.01, help="local stand-in latency, s")
+    args = parser.parse_args()
+
+    factory = ProductFactory.from_file(seed=args.seed)
+    start = time.perf_counter()
+    products = factory.batch(args.count)
+    generated = time.perf_counter() - start
+    print(f"generated {len(products)} products in {generated * 1000:.1f} ms "
+          f"({len(products) / generated:,.0f} products/s)")
+
+    def run(base_url):
+        report = bulk_seed(products, base_url, args.concurrency)
+        print(f"seeded {len(report.created)} products in {report.elapsed:.2f} s "
+              f"({report.rate:.1f} adds/s), {len(report.failed)} failed")
+
+    if args.url:
+        run(args.url)
+    else:
+        with LocalShop(latency=args.latency) as shop:
+            run(shop.base_url)
+
+
+if __name__ == "__main__":
+    main()
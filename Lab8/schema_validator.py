@@ -0,0 +1,277 @@
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+_TYPES = {
+    "string": str,
+    "null": type(None),
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+_SUPPORTED = {"type", "pattern", "minLength", "maxLength", "enum",
+              "properties", "required", "additionalProperties"}
+
+# Проверка одного значения: (значение, путь) -> список ошибок
+Check = Callable[[Any, str], List[str]]
+Predicate = Callable[[Any], bool]
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+class ProductReport(NamedTuple):
+    index: int
+    product_id: Optional[str]
+    errors: List[str]
+
+
+def _is_type(value, name):
+    if name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _TYPES[name])
+
+
+def _compile_predicate(schema: dict) -> Predicate:
+    """Generate one Python function that answers valid/invalid for ``schema``.
+
+    The generated code inlines every check, builds no messages and no path
+    strings, and stops at the first failure.
+    """
+    namespace = {"_is_type": _is_type, "_MISSING": _MISSING}
+    lines = ["def valid(v0):"]
+    _emit(schema, "v0", 1, lines, namespace)
+    lines.append("    return True")
+    exec(compile("\n".join(lines), "<schema>", "exec"), namespace)
+    return namespace["valid"]
+
+
+def _emit(schema: dict, var: str, depth: int, lines: List[str], namespace: dict):
+    pad = "    " * depth
+
+    def constant(value):
+        name = f"c{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    def fail_if(condition, guard=pad):
+        lines.append(f"{guard}if {condition}:")
+        lines.append(f"{guard}    return False")
+
+    types = schema.get("type")
+    only_strings = False
+    if types is not None:
+        types = [types] if isinstance(types, str) else list(types)
+        if all(name in _TYPES for name in types):
+            python_types = tuple(_TYPES[name] for name in types)
+            fail_if(f"not isinstance({var}, {constant(python_types)})")
+            only_strings = python_types == (str,)
+        else:
+            fail_if(f"not any(_is_type({var}, n) for n in {constant(types)})")
+
+    string_checks = []
+    if "pattern" in schema:
+        string_checks.append(f"{constant(compile_pattern(schema['pattern']).search)}({var}) is None")
+    if schema.get("minLength") is not None:
+        string_checks.append(f"len({var}) < {int(schema['minLength'])}")
+    if schema.get("maxLength") is not None:
+        string_checks.append(f"len({var}) > {int(schema['maxLength'])}")
+    if string_checks:
+        condition = " or ".join(string_checks)
+        if only_strings:
+            fail_if(condition)
+        else:
+            fail_if(f"isinstance({var}, str) and ({condition})")
+
+    if "enum" in schema:
+        fail_if(f"{var} not in {constant(list(schema['enum']))}")
+
+    if {"properties", "required", "additionalProperties"} & set(schema):
+        lines.append(f"{pad}if isinstance({var}, dict):")
+        inner = pad + "    "
+        header = len(lines)
+        properties = schema.get("properties", {})
+        if schema.get("required"):
+            fail_if(f"not {var}.keys() >= {constant(set(schema['required']))}", inner)
+        if schema.get("additionalProperties", True) is False:
+            fail_if(f"not {var}.keys() <= {constant(set(properties))}", inner)
+        for name, sub in properties.items():
+            item = f"v{depth}_{len(lines)}"
+            lines.append(f"{inner}{item} = {var}.get({name!r}, _MISSING)")
+            lines.append(f"{inner}if {item} is not _MISSING:")
+            before = len(lines)
+            _emit(sub, item, depth + 2, lines, namespace)
+            if len(lines) == before:
+                del lines[before - 2:]
+        if len(lines) == header:
+            lines.append(f"{inner}pass")
+
+
+_MISSING = object()
+
+
+def _compile(schema: dict) -> Check:
+    unsupported = set(schema) - _SUPPORTED
+    if unsupported:
+        raise ValueError(f"Unsupported schema keywords: {', '.join(sorted(unsupported))}")
+
+    checks = []
+    types = schema.get("type")
+    if types is not None:
+        types = [types] if isinstance(types, str) else list(types)
+        for name in types:
+            if name not in _TYPES and name not in ("integer", "number"):
+                raise ValueError(f"Unsupported schema type: {name}")
+        message = " or ".join(types)
+        if all(name in _TYPES for name in types):
+            python_types = tuple(_TYPES[name] for name in types)
+
+            def check_type(value, path):
+                if isinstance(value, python_types):
+                    return []
+                return [f"{path}: {value!r} is not of type {message}"]
+        else:
+            def check_type(value, path):
+                if any(_is_type(value, name) for name in types):
+                    return []
+                return [f"{path}: {value!r} is not of type {message}"]
+        checks.append(check_type)
+
+    if "pattern" in schema:
+        search = compile_pattern(schema["pattern"]).search
+        pattern = schema["pattern"]
+
+        def check_pattern(value, path):
+            if isinstance(value, str) and search(value) is None:
+                return [f"{path}: {value!r} does not match {pattern!r}"]
+            return []
+        checks.append(check_pattern)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    if min_length is not None or max_length is not None:
+        def check_length(value, path):
+            if not isinstance(value, str):
+                return []
+            if min_length is not None and len(value) < min_length:
+                return [f"{path}: {value!r} is shorter than {min_length}"]
+            if max_length is not None and len(value) > max_length:
+                return [f"{path}: {value!r} is longer than {max_length}"]
+            return []
+        checks.append(check_length)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path):
+            return [] if value in allowed else [f"{path}: {value!r} is not one of {allowed!r}"]
+        checks.append(check_enum)
+
+    if {"properties", "required", "additionalProperties"} & set(schema):
+        properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = list(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        if not isinstance(additional, bool):
+            raise ValueError("Only boolean additionalProperties is supported")
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}: '{name}' is a required property"
+                      for name in required if name not in value]
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    errors += check(item, f"{path}.{name}")
+                elif not additional:
+                    errors.append(f"{path}: additional property '{name}' is not allowed")
+            return errors
+        checks.append(check_object)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path):
+        errors = []
+        for check in checks:
+            errors += check(value, path)
+        return errors
+    return check_all
+
+
+class SchemaValidator:
+    """JSON schema compiled once into two checkers that must agree.
+
+    Every product first goes through a generated boolean predicate that
+    builds no messages; only products that fail it are checked again by
+    nested closures that collect the errors and have the final say.
+    Covers the keywords product schemas use (type, pattern,
+    min/maxLength, enum, properties, required, boolean
+    additionalProperties) and rejects anything else at compile time.
+    Patterns go through a shared ``compile_pattern`` cache.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._check = _compile(schema)
+        self._valid = _compile_predicate(schema)
+
+    @classmethod
+    def from_file(cls, path: str) -> "SchemaValidator":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def is_valid(self, product) -> bool:
+        return self._valid(product)
+
+    def validate(self, product) -> List[str]:
+        return [] if self._valid(product) else self._check(product, "$")
+
+    def validate_many(self, products: Iterable[dict], processes: Optional[int] = None,
+                      chunk_size: int = 5000) -> List[ProductReport]:
+        """Return reports for the invalid products only, in catalog order.
+
+        With ``processes`` set, chunks of the catalog are validated in a
+        process pool; each worker compiles the schema once.
+        """
+        products = list(products)
+        if not processes:
+            return _validate_chunk(self._valid, self._check, 0, products)
+
+        starts = range(0, len(products), chunk_size)
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(self.schema,)) as pool:
+            chunks = pool.map(_validate_in_worker, starts,
+                              (products[start:start + chunk_size] for start in starts))
+            return [report for chunk in chunks for report in chunk]
+
+
+def _validate_chunk(valid: Predicate, check: Check, start: int,
+                    products: List[dict]) -> List[ProductReport]:
+    reports = []
+    for index, product in enumerate(products, start):
+        if valid(product):
+            continue
+        # Решают замыкания: предикат только пропускает заведомо правильные товары
+        errors = check(product, "$")
+        if errors:
+            product_id = product.get("id") if isinstance(product, dict) else None
+            reports.append(ProductReport(index, product_id, errors))
+    return reports
+
+
+_worker_validator: Optional[SchemaValidator] = None
+
+
+def _init_worker(schema):
+    global _worker_validator
+    _worker_validator = SchemaValidator(schema)
+
+
+def _validate_in_worker(start, products):
+    return _validate_chunk(_worker_validator._valid, _worker_validator._check, start, products)
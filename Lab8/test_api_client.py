@@ -0,0 +1,246 @@
+import asyncio
+import json
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+import api
+from async_api import AsyncProductClient
+from local_shop import LocalShop
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = headers or {}
+
+    @property
+    def content(self):
+        return json.dumps(self.payload).encode()
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def client():
+    client = api.ProductClient("http://shop.local/shop/", retries=2, backoff=0)
+    return client
+
+
+def use_session(client, outcomes):
+    client.session = FakeSession(outcomes)
+    return client.session
+
+
+def test_reads_retry_timeouts_and_server_errors(client):
+    session = use_session(client, [requests.exceptions.ReadTimeout(), FakeResponse(503),
+                                   FakeResponse(200, [{"id": "1"}])])
+
+    assert client.get_all_products() == [{"id": "1"}]
+    assert len(session.calls) == 3
+    assert session.calls[0][1] == "http://shop.local/shop/api/products"
+    assert session.calls[0][2]["timeout"] == client.timeout
+
+
+def test_writes_are_not_retried_after_timeout(client):
+    session = use_session(client, [requests.exceptions.ReadTimeout(), FakeResponse(200, {"status": 1})])
+
+    assert client.add_product({"title": "Test watch"}) is None
+    assert len(session.calls) == 1
+
+
+def refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection")
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "/shop/api/addproduct", reason))
+
+
+def test_writes_retry_only_connections_never_established(client):
+    session = use_session(client, [refused(), FakeResponse(200, {"status": 1, "id": "42"})])
+
+    assert client.add_product({"title": "Test watch"}) == {"status": 1, "id": "42"}
+    assert len(session.calls) == 2
+
+    # Соединение оборвалось после отправки: сервер мог уже создать товар
+    dropped = requests.exceptions.ConnectionError(ProtocolError("Connection aborted."))
+    session = use_session(client, [dropped, FakeResponse(200, {"status": 1, "id": "43"})])
+
+    assert client.add_product({"title": "Test watch"}) is None
+    assert len(session.calls) == 1
+
+
+def test_retries_are_bounded(client):
+    session = use_session(client, [FakeResponse(503)] * 5)
+
+    assert client.get_all_products() is None
+    assert len(session.calls) == 3
+
+
+def test_delete_sends_id_as_query(client):
+    session = use_session(client, [FakeResponse(200, {"status": 0})])
+
+    assert client.delete_product("56789") == {"status": 0}
+    assert session.calls[0][2]["params"] == {"id": "56789"}
+
+
+def test_default_client_follows_base_url(monkeypatch):
+    monkeypatch.setattr(api, "BASE_URL", "http://127.0.0.1:1/shop/")
+
+    assert api.client.base_url == "http://127.0.0.1:1/shop"
+
+
+def test_catalog_is_dropped_when_base_url_changes(monkeypatch):
+    client = api.ProductClient(retries=0, backoff=0)
+    session = use_session(client, [FakeResponse(200, [{"id": "1"}], {"ETag": '"v1"'}),
+                                   FakeResponse(200, [])])
+    monkeypatch.setattr(api, "BASE_URL", "http://shop-a.local/shop/")
+    assert client.get_product_by_id(1) == {"id": "1"}
+
+    monkeypatch.setattr(api, "BASE_URL", "http://shop-b.local/shop/")
+    assert client.get_product_by_id(1) is None
+    assert session.calls[1][1] == "http://shop-b.local/shop/api/products"
+    assert session.calls[1][2]["headers"] == {}
+
+
+def test_products_added_by_other_clients_are_found():
+    async def add(base_url):
+        async with AsyncProductClient(base_url) as other:
+            return await other.add_product({"title": "Watch", "price": "1", "category_id": "1"})
+
+    with LocalShop() as shop, api.ProductClient(shop.base_url, retries=0) as client:
+        assert client.get_all_products() == []
+        product_id = asyncio.run(add(shop.base_url)).data["id"]
+
+        assert client.get_product_by_id(product_id)["title"] == "Watch"
+        assert client.cache.stats["refreshes"] == 2
+
+
+def test_alias_queries_follow_base_url(monkeypatch):
+    product = {"id": "1", "category_id": "1", "title": "Only on A", "alias": "only-on-a"}
+    with LocalShop([product]) as shop_a, LocalShop() as shop_b:
+        monkeypatch.setattr(api, "BASE_URL", shop_a.base_url)
+        assert api.find_by_alias("only-on-a")["id"] == "1"
+        assert api.next_free_alias("only-on-a") == "only-on-a-0"
+
+        monkeypatch.setattr(api, "BASE_URL", shop_b.base_url)
+        assert api.find_by_alias("only-on-a") is None
+        assert api.find_by_category(1) == []
+        assert api.alias_chain("only-on-a") == []
+        assert api.next_free_alias("only-on-a") == "only-on-a"
+
+
+@pytest.mark.parametrize("kwargs", [{"retries": -1}, {"pool_size": 0}])
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        api.ProductClient(**kwargs)
+
+
+class StreamResponse(FakeResponse):
+    def __init__(self, body, chunk_size=8):
+        super().__init__(200)
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_find_product_stops_at_first_match(client):
+    catalog = [{"id": str(i), "alias": f"watch-{i}"} for i in range(1, 101)]
+    response = StreamResponse(json.dumps(catalog).encode())
+    session = use_session(client, [response])
+
+    assert client.find_product(alias="watch-3") == {"id": "3", "alias": "watch-3"}
+    assert session.calls[0][2]["stream"] is True
+    assert response.closed
+    assert response.read < len(response.chunks) // 10
+
+
+def test_find_product_misses_and_bad_bodies(client):
+    use_session(client, [StreamResponse(b'[{"id": "1"}]'), StreamResponse(b"<b>Fatal error</b>")])
+
+    assert client.find_product(56789) is None
+    assert client.find_product(1) is None
+    with pytest.raises(ValueError):
+        client.find_product()
+
+
+def test_sync_reports_per_product_diff(client):
+    first = [{"id": "1", "price": "100"}, {"id": "2", "price": "200"}]
+    second = [{"id": "1", "price": "150"}, {"id": "3", "price": "300"}]
+    use_session(client, [FakeResponse(200, first), FakeResponse(200, second)])
+
+    assert client.sync_products().added == {"1": first[0], "2": first[1]}
+    diff = client.sync_products()
+
+    assert diff.added == {"3": second[1]}
+    assert diff.changed == {"1": second[0]}
+    assert diff.removed == {"2": first[1]}
+    assert client.sync_stats["changed"] == 2
+
+
+def test_cache_applies_catalog_diffs(client, monkeypatch):
+    first = [{"id": "1", "alias": "watch"}, {"id": "2", "alias": "watch-0"}]
+    second = [{"id": "1", "alias": "watch"}, {"id": "3", "alias": "watch-1"}]
+    use_session(client, [FakeResponse(200, first)] + [FakeResponse(200, second)] * 3)
+    assert client.get_all_products() == first
+
+    # После первой загрузки кэш получает только разницу каталогов
+    monkeypatch.setattr(client.cache, "load", None)
+    client.cache.invalidate()
+    assert client.get_product_by_id(3) == {"id": "3", "alias": "watch-1"}
+    assert client.get_product_by_id(2) is None
+
+    client.cache.invalidate()
+    assert client.cache.find_by_alias("watch-0") is None
+    assert client.sync_stats == {"downloads": 4, "not_modified": 0, "unchanged": 2, "changed": 2}
+
+
+def test_sync_revalidates_with_etag_and_last_modified(client):
+    catalog = [{"id": "1"}]
+    validators = {"ETag": '"v1"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"}
+    session = use_session(client, [FakeResponse(200, catalog, validators)] + [FakeResponse(304)] * 2)
+
+    client.sync_products()
+    diff = client.sync_products()
+
+    assert diff.is_empty
+    assert session.calls[1][2]["headers"] == {"If-None-Match": '"v1"',
+                                             "If-Modified-Since": "Mon, 19 Oct 2026 10:00:00 GMT"}
+    assert client.get_product_by_id(1) == {"id": "1"}
+    assert client.sync_stats["not_modified"] == 2
+
+
+def test_sync_falls_back_to_content_hash(client):
+    catalog = [{"id": "1", "title": "Watch"}]
+    session = use_session(client, [FakeResponse(200, catalog), FakeResponse(200, catalog)])
+
+    client.sync_products()
+    assert client.sync_products().is_empty
+    assert session.calls[1][2]["headers"] == {}
+    assert client.sync_stats["unchanged"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from aiohttp import web
+
+from async_api import AsyncProductClient
+from instrumentation import RequestRecorder
+
+
+class ShopStub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.products = {}
+        self.catalog_downloads = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _enter(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+
+    async def products_handler(self, request):
+        self.catalog_downloads += 1
+        await self._enter()
+        return web.json_response(list(self.products.values()))
+
+    async def add_handler(self, request):
+        await self._enter()
+        data = await request.json()
+        if not data:
+            return web.Response(text="<b>Fatal error</b>", status=200)
+        product_id = str(len(self.products) + 1)
+        self.products[product_id] = dict(data, id=product_id)
+        return web.json_response({"id": int(product_id), "status": 1})
+
+    async def delete_handler(self, request):
+        await self._enter()
+        removed = self.products.pop(request.query["id"], None)
+        return web.json_response({"status": int(removed is not None)})
+
+
+def run_with_stub(stub, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_get("/shop/api/products", stub.products_handler)
+        app.router.add_post("/shop/api/addproduct", stub.add_handler)
+        app.router.add_get("/shop/api/deleteproduct", stub.delete_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(f"http://127.0.0.1:{port}/shop/")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_add_lookup_delete_fan_out():
+    stub = ShopStub(latency=0.01)
+
+    async def scenario(base_url):
+        async with AsyncProductClient(base_url, concurrency=5) as client:
+            added = await client.add_products({"title": f"Watch {i}"} for i in range(20))
+            ids = [result.data["id"] for result in added]
+            found = await client.get_products_by_ids(ids)
+            deleted = await client.delete_products(ids)
+            return added, found, deleted
+
+    added, found, deleted = run_with_stub(stub, scenario)
+
+    assert all(result.ok and result.data["status"] == 1 for result in added)
+    assert sorted(result.data["title"] for result in found) == sorted(f"Watch {i}" for i in range(20))
+    assert all(result.data == {"status": 1} for result in deleted)
+    assert stub.max_in_flight == 5
+    assert stub.catalog_downloads == 1
+
+
+def test_structured_errors():
+    stub = ShopStub()
+
+    async def scenario(base_url):
+        async with AsyncProductClient(base_url) as client:
+            missing = await client.get_product_by_id(56789)
+            not_json = await client.add_product({})
+            not_found = await client.edit_product({"id": "1"})
+        async with AsyncProductClient("http://127.0.0.1:9/shop") as client:
+            unreachable = await client.get_all_products()
+        return missing, not_json, not_found, unreachable
+
+    missing, not_json, not_found, unreachable = run_with_stub(stub, scenario)
+
+    assert not missing.ok and missing.error == "Product 56789 not found"
+    assert not not_json.ok and not_json.data == "<b>Fatal error</b>"
+    assert not not_found.ok and not_found.status == 404
+    assert not unreachable.ok and unreachable.status is None and "ClientConnectorError" in unreachable.error
+
+
+class ChunkedShopStub(ShopStub):
+    async def products_handler(self, request):
+        # Без Content-Length и с кириллицей: символов в теле меньше, чем байтов
+        response = web.StreamResponse(headers={"Content-Type": "application/json; charset=utf-8"})
+        await response.prepare(request)
+        await response.write(json.dumps(list(self.products.values()), ensure_ascii=False).encode())
+        await response.write_eof()
+        return response
+
+
+def test_recorded_size_is_in_bytes():
+    stub = ChunkedShopStub()
+    stub.products["1"] = {"id": "1", "title": "Часы"}
+    recorder = RequestRecorder(enabled=True)
+
+    async def scenario(base_url):
+        async with AsyncProductClient(base_url, recorder=recorder) as client:
+            return await client.get_all_products()
+
+    result = run_with_stub(stub, scenario)
+
+    assert result.data == [{"id": "1", "title": "Часы"}]
+    body = json.dumps(result.data, ensure_ascii=False)
+    assert recorder.session_summary()[0]["bytes"] == len(body.encode()) > len(body)
@@ -0,0 +1,170 @@
+import pytest
+
+from catalog_cache import CatalogCache
+from catalog_snapshot import CatalogDiff
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCatalog:
+    def __init__(self, products):
+        self.products = products
+        self.downloads = 0
+        self.down = False
+
+    def __call__(self):
+        self.downloads += 1
+        if self.down:
+            return None
+        return [dict(product) for product in self.products]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def catalog():
+    return FakeCatalog([{"id": "1", "alias": "watch"}, {"id": "2", "alias": "watch-0"}])
+
+
+def test_one_download_per_freshness_window(clock, catalog):
+    cache = CatalogCache(catalog, max_age=5, clock=clock)
+
+    assert cache.get(1)["alias"] == "watch"
+    assert cache.get("2")["alias"] == "watch-0"
+    assert cache.get(1)["alias"] == "watch"
+    assert catalog.downloads == 1
+
+    clock.now = 6
+    cache.get(1)
+    assert catalog.downloads == 2
+    assert cache.stats["hits"] == 2
+    assert cache.stats["misses"] == 2
+    assert cache.stats["not_found"] == 0
+
+
+def test_unknown_id_is_checked_with_the_server(clock, catalog):
+    cache = CatalogCache(catalog, max_age=60, clock=clock)
+    assert cache.get(3) is None
+
+    # Товар добавил кто-то другой: клиент об этом не знает
+    catalog.products.append({"id": "3", "alias": "watch-1"})
+
+    assert cache.get(3)["alias"] == "watch-1"
+    assert catalog.downloads == 2
+    assert cache.stats["not_found"] == 1
+
+
+def test_pending_id_forces_refresh(clock, catalog):
+    cache = CatalogCache(catalog, max_age=60, clock=clock)
+    cache.get(1)
+
+    catalog.products.append({"id": "3", "alias": "watch-1"})
+    cache.invalidate(3)
+
+    assert cache.get(3)["alias"] == "watch-1"
+    assert catalog.downloads == 2
+
+
+def test_deleted_product_is_verified_by_refresh(clock, catalog):
+    cache = CatalogCache(catalog, max_age=60, clock=clock)
+    cache.get(1)
+
+    catalog.products.pop(0)
+    cache.invalidate(1)
+
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+    assert catalog.downloads == 2
+
+
+def test_returned_products_are_copies(clock, catalog):
+    cache = CatalogCache(catalog, clock=clock)
+    cache.get(1)["alias"] = "changed"
+
+    assert cache.get(1)["alias"] == "watch"
+
+
+def test_failed_refresh_keeps_pending_ids_unknown(clock, catalog):
+    cache = CatalogCache(catalog, max_age=60, clock=clock)
+    cache.get(1)
+    catalog.down = True
+    cache.invalidate(2)
+
+    assert cache.get(2) is None
+    assert cache.get(1)["alias"] == "watch"
+
+
+def test_load_resets_freshness(clock, catalog):
+    cache = CatalogCache(catalog, max_age=5, clock=clock)
+    cache.load([{"id": "7", "alias": "loaded"}])
+
+    assert cache.get(7)["alias"] == "loaded"
+    assert catalog.downloads == 0
+
+
+def test_invalid_max_age(catalog):
+    with pytest.raises(ValueError):
+        CatalogCache(catalog, max_age=-1)
+
+
+def test_alias_and_category_indexes(clock):
+    catalog = FakeCatalog([
+        {"id": "1", "alias": "watch", "category_id": "1"},
+        {"id": "2", "alias": "watch-0", "category_id": "1"},
+        {"id": "3", "alias": "watch-2", "category_id": "15"},
+        {"id": "4", "alias": "casio", "category_id": "2"},
+    ])
+    cache = CatalogCache(catalog, max_age=5, clock=clock)
+
+    assert cache.find_by_alias("watch-0")["id"] == "2"
+    assert cache.find_by_alias("rolex") is None
+    assert [p["id"] for p in cache.find_by_category(1)] == ["1", "2"]
+    assert cache.find_by_category("9") == []
+    assert [p["alias"] for p in cache.alias_chain("watch")] == ["watch", "watch-0", "watch-2"]
+    assert cache.next_free_alias("watch") == "watch-1"
+    assert cache.next_free_alias("casio") == "casio-0"
+    assert cache.next_free_alias("rolex") == "rolex"
+    assert catalog.downloads == 1
+
+
+def test_indexes_follow_pending_ids(clock, catalog):
+    cache = CatalogCache(catalog, max_age=5, clock=clock)
+    assert cache.next_free_alias("watch") == "watch-1"
+
+    catalog.products.append({"id": "3", "alias": "watch-1"})
+    cache.invalidate(3)
+
+    assert cache.next_free_alias("watch") == "watch-2"
+    assert cache.find_by_alias("watch-1")["id"] == "3"
+    assert catalog.downloads == 2
+
+
+def test_diff_updates_indexes_in_place(clock):
+    updates = [[{"id": "1", "alias": "watch", "category_id": "1"},
+                {"id": "2", "alias": "watch-0", "category_id": "1"},
+                {"id": "3", "alias": "casio", "category_id": "2"}],
+               CatalogDiff(added={"4": {"id": "4", "alias": "watch-1", "category_id": "2"}},
+                           changed={"3": {"id": "3", "alias": "casio", "category_id": "1"}},
+                           removed={"2": {"id": "2", "alias": "watch-0", "category_id": "1"}}),
+               CatalogDiff.empty()]
+    cache = CatalogCache(lambda: updates.pop(0), max_age=5, clock=clock)
+    for _ in range(3):
+        assert cache.refresh()
+
+    assert cache.find_by_alias("watch-0") is None
+    assert [p["alias"] for p in cache.alias_chain("watch")] == ["watch", "watch-1"]
+    assert cache.next_free_alias("watch") == "watch-0"
+    assert [p["id"] for p in cache.find_by_category(1)] == ["1", "3"]
+    assert [p["id"] for p in cache.find_by_category(2)] == ["4"]
+    assert cache.peek(2) is None
+    assert cache.stats["size"] == 3
+    assert updates == []
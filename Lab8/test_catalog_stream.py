@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from catalog_stream import iter_json_array
+
+
+def chunked(text, size):
+    data = text.encode()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+PRODUCTS = [{"id": str(i), "title": f"Часы {i}", "price": 100 + i, "old_price": None}
+            for i in range(1, 30)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 100000])
+def test_items_match_json_loads(size):
+    body = json.dumps(PRODUCTS, ensure_ascii=False, indent=1)
+
+    assert list(iter_json_array(chunked(body, size))) == PRODUCTS
+
+
+@pytest.mark.parametrize("body, expected", [
+    ("[]", []),
+    (" [ ] ", []),
+    ("[1, 23, 456]", [1, 23, 456]),
+    ('[true,null,"a,]b",[1,[2]]]', [True, None, "a,]b", [1, [2]]]),
+])
+def test_scalars_and_nesting(body, expected):
+    assert list(iter_json_array(chunked(body, 1))) == expected
+
+
+def test_early_exit_stops_reading():
+    read = []
+
+    def chunks():
+        for chunk in chunked(json.dumps(PRODUCTS), 16):
+            read.append(chunk)
+            yield chunk
+
+    for product in iter_json_array(chunks()):
+        if product["id"] == "2":
+            break
+
+    assert len(read) < len(chunked(json.dumps(PRODUCTS), 16)) // 4
+
+
+@pytest.mark.parametrize("body", ['{"id": "1"}', "[1, 2", "[1 2]", "[1,]", '[{"id": '])
+def test_malformed_bodies(body):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunked(body, 3)))
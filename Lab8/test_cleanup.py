@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import api
+from cleanup import CleanupJournal, ProductCleaner, TrackedIds
+from local_shop import LocalShop
+
+
+class DeleteStub:
+    """deleteproduct only: status 1 for known ids, 0 for unknown, 500 for "broken"."""
+
+    def __init__(self, product_ids, latency=0.0):
+        self.products = set(product_ids)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                product_id = parse_qs(urlparse(self.path).query)["id"][0]
+                with lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(latency)
+                with lock:
+                    stub.in_flight -= 1
+                    removed = product_id in stub.products
+                    stub.products.discard(product_id)
+                status = 500 if product_id == "broken" else 200
+                body = json.dumps({"status": int(removed)}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/shop"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "cleanup_journal")
+
+
+SHOP = "http://shop.test/shop"
+
+
+def test_journal_pending_and_compact(journal_path):
+    journal = CleanupJournal(journal_path)
+    for product_id in (1, 2, 3):
+        journal.add(SHOP, product_id)
+    journal.remove(SHOP, ["2"])
+
+    assert CleanupJournal(journal_path).pending(SHOP) == ["1", "3"]
+
+    journal.compact()
+    with open(journal_path) as f:
+        assert f.read() == f"+{SHOP} 1\n+{SHOP} 3\n"
+
+    journal.remove(SHOP, ["1", "3"])
+    journal.compact()
+    assert journal.pending(SHOP) == []
+
+
+def test_tracked_ids_are_journalled(journal_path):
+    ids = TrackedIds(ProductCleaner(journal_path, SHOP))
+    ids.append(7)
+    ids.append(None)
+
+    assert ids == [7, None]
+    assert CleanupJournal(journal_path).pending(SHOP) == ["7"]
+
+
+def test_sweep_deletes_concurrently_and_keeps_failures(journal_path):
+    stub = DeleteStub([str(i) for i in range(1, 21)], latency=0.02)
+    try:
+        cleaner = ProductCleaner(journal_path, stub.base_url, concurrency=4)
+        for product_id in [*range(1, 21), 404, "broken"]:
+            cleaner.track(product_id)
+        report = cleaner.sweep()
+    finally:
+        stub.close()
+
+    assert sorted(report.deleted, key=int) == [str(i) for i in range(1, 21)]
+    assert report.missing == ["404"]
+    assert list(report.failed) == ["broken"]
+    assert stub.products == set()
+    assert stub.max_in_flight == 4
+    assert cleaner.pending() == ["broken"]
+
+
+def test_next_session_sweeps_orphans(journal_path):
+    # Прошлый запуск упал после создания товаров, не успев их удалить
+    stub = DeleteStub(["11", "12"])
+    try:
+        crashed = ProductCleaner(journal_path, stub.base_url)
+        crashed.track(11)
+        crashed.track(12)
+
+        report = ProductCleaner(journal_path, stub.base_url).sweep()
+    finally:
+        stub.close()
+
+    assert sorted(report.deleted) == ["11", "12"]
+    assert stub.products == set()
+    assert not CleanupJournal(journal_path).pending(stub.base_url)
+
+
+def test_sweep_leaves_other_hosts_alone(journal_path):
+    # Тот же журнал раньше вёл запуск на другом сервере: его id здесь чужие
+    ProductCleaner(journal_path, SHOP).track(1)
+
+    stub = DeleteStub(["1", "2"])
+    try:
+        cleaner = ProductCleaner(journal_path, stub.base_url)
+        cleaner.track(2)
+        report = cleaner.sweep()
+    finally:
+        stub.close()
+
+    assert report.deleted == ["2"]
+    assert stub.products == {"1"}
+    assert CleanupJournal(journal_path).entries() == [(SHOP, "1")]
+
+
+def test_sweep_only_given_ids(journal_path):
+    stub = DeleteStub(["1", "2", "3"])
+    try:
+        cleaner = ProductCleaner(journal_path, stub.base_url)
+        for product_id in (1, 2, 3):
+            cleaner.track(product_id)
+        report = cleaner.sweep([1, 3])
+    finally:
+        stub.close()
+
+    assert sorted(report.deleted) == ["1", "3"]
+    assert stub.products == {"2"}
+    assert cleaner.pending() == ["2"]
+
+
+def test_sweep_invalidates_the_api_cache(journal_path, monkeypatch):
+    with LocalShop() as shop:
+        monkeypatch.setattr(api, "BASE_URL", shop.base_url)
+        product_id = api.add_product({"title": "Watch", "price": "1", "category_id": "1"})["id"]
+        assert api.get_product_by_id(product_id) is not None
+
+        cleaner = ProductCleaner(journal_path)
+        cleaner.track(product_id)
+        assert cleaner.sweep().deleted == [str(product_id)]
+
+        assert api.get_product_by_id(product_id) is None
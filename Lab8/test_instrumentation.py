@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+
+import api
+from async_api import AsyncProductClient
+from instrumentation import Histogram, RequestRecorder, format_report
+from local_shop import LocalShop
+
+
+def test_histogram_summary():
+    histogram = Histogram()
+    for latency_us in [100] * 90 + [5000] * 10:
+        histogram.add(latency_us, 10)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100 and summary["bytes"] == 1000
+    assert summary["min_ms"] == 0.1 and summary["max_ms"] == 5.0
+    assert summary["p50_ms"] == 0.128
+    assert summary["p95_ms"] == 5.0
+    assert summary["mean_ms"] == 0.59
+
+
+def test_per_test_histograms_reset():
+    recorder = RequestRecorder(enabled=True)
+    recorder.record("GET", "products", 200, 100, time.perf_counter_ns())
+    recorder.start_test()
+    recorder.record("GET", "deleteproduct", 200, 13, time.perf_counter_ns())
+
+    assert [row["endpoint"] for row in recorder.test_summary()] == ["deleteproduct"]
+    assert [row["endpoint"] for row in recorder.session_summary()] == ["deleteproduct", "products"]
+    assert "deleteproduct" in format_report(recorder.session_summary())
+
+
+def test_worker_histograms_merge():
+    workers = [RequestRecorder(enabled=True), RequestRecorder(enabled=True)]
+    for latency_us, worker in zip([100, 5000], workers):
+        for _ in range(10):
+            worker.record("GET", "products", 200, 10, time.perf_counter_ns() - latency_us * 1000)
+    workers[1].record("GET", "deleteproduct", 200, 13, time.perf_counter_ns())
+
+    controller = RequestRecorder()
+    for worker in workers:
+        controller.merge(json.loads(json.dumps(worker.export())))
+
+    rows = {row["endpoint"]: row for row in controller.session_summary()}
+    assert rows["products"]["count"] == 20 and rows["products"]["bytes"] == 200
+    assert rows["products"]["min_ms"] >= 0.1 and rows["products"]["max_ms"] >= 5.0
+    assert rows["products"]["p50_ms"] < 1 < rows["products"]["p95_ms"]
+    assert rows["deleteproduct"]["count"] == 1
+
+
+def test_record_overhead_is_microseconds():
+    recorder = RequestRecorder(enabled=True)
+    calls = 20000
+    start = time.perf_counter()
+    for _ in range(calls):
+        recorder.record("GET", "products", 200, 100, time.perf_counter_ns())
+    per_call_us = (time.perf_counter() - start) / calls * 1e6
+
+    assert per_call_us < 50
+
+
+def test_clients_record_calls():
+    recorder = RequestRecorder(enabled=True)
+    with LocalShop() as shop:
+        with api.ProductClient(shop.base_url, retries=0, recorder=recorder) as client:
+            client.add_product({"title": "Watch", "price": "1"})
+            client.add_product({})
+            client.get_all_products()
+            client.find_product(1)
+
+        async def delete():
+            async with AsyncProductClient(shop.base_url, recorder=recorder) as client:
+                await client.delete_products([1, 2])
+        asyncio.run(delete())
+
+    with api.ProductClient("http://127.0.0.1:9/shop", retries=0, recorder=recorder) as client:
+        client.delete_product(1)
+
+    rows = {(row["method"], row["endpoint"], row["status"]): row for row in recorder.session_summary()}
+    assert rows[("POST", "addproduct", "200")]["count"] == 2
+    assert rows[("GET", "products", "200")]["count"] == 2
+    assert rows[("GET", "products", "200")]["bytes"] > 0
+    assert rows[("GET", "deleteproduct", "200")]["count"] == 2
+    assert rows[("GET", "deleteproduct", "ConnectionError")]["count"] == 1
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = RequestRecorder()
+    with LocalShop() as shop:
+        with api.ProductClient(shop.base_url, recorder=recorder) as client:
+            client.get_all_products()
+
+    assert recorder.session_summary() == []
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+import requests
+
+import api
+from local_shop import LocalShop, seed_products
+
+
+@pytest.fixture
+def shop():
+    with LocalShop() as shop:
+        yield shop
+
+
+@pytest.fixture
+def client(shop):
+    with api.ProductClient(shop.base_url, retries=0, catalog_max_age=0) as client:
+        yield client
+
+
+def product(title="Test watch", **fields):
+    return dict({"category_id": "12", "title": title, "alias": "ignored", "content": None,
+                 "price": "123", "old_price": "100", "status": "0", "keywords": None,
+                 "description": None, "hit": "1"}, **fields)
+
+
+def test_alias_deduplication(client):
+    ids = [client.add_product(product())["id"] for _ in range(3)]
+
+    assert [client.get_product_by_id(i)["alias"] for i in ids] == \
+        ["test-watch", "test-watch-0", "test-watch-1"]
+
+    client.delete_product(ids[1])
+    fourth = client.add_product(product())["id"]
+    assert client.get_product_by_id(fourth)["alias"] == "test-watch-0"
+
+
+def test_add_edit_delete_answers(shop, client):
+    added = client.add_product(product())
+    assert added == {"id": 1, "status": 1}
+    assert client.get_product_by_id(1)["price"] == "123"
+
+    assert client.edit_product(dict(product("Edited watch"), id="1")) == {"status": 1}
+    assert client.get_product_by_id(1)["alias"] == "edited-watch"
+    assert client.edit_product(dict(product(), id="999")) == {"status": 0}
+
+    assert client.delete_product(1) == {"status": 1}
+    assert client.delete_product(1) == {"status": 0}
+    assert [endpoint for _, endpoint in shop.requests].count("deleteproduct") == 2
+
+
+def test_observed_server_quirks(client):
+    assert client.add_product({}) is None
+    assert client.add_product(product(price="abc")) is None
+    assert client.add_product(product(price="-123"))["status"] == 1
+
+    hidden = client.add_product(product("Category 15 watch", category_id="15"))
+    assert hidden["status"] == 1
+    assert client.get_product_by_id(hidden["id"]) is None
+
+
+def test_unknown_endpoint_is_404(shop):
+    response = requests.get(f"{shop.base_url}api/unknown")
+
+    assert response.status_code == 404
+
+
+def test_seeded_catalog_latency_and_etag():
+    with LocalShop.seeded(1000, seed=7, latency=0.05, conditional=True) as shop:
+        with api.ProductClient(shop.base_url, retries=0) as client:
+            start = time.perf_counter()
+            assert client.sync_products().added.keys() == {str(i) for i in range(1, 1001)}
+            assert time.perf_counter() - start >= 0.05
+            assert client.sync_products().is_empty
+            assert client.sync_stats["not_modified"] == 1
+
+    assert seed_products(5, seed=7) == seed_products(5, seed=7) != seed_products(5, seed=8)
+
+
+def test_wait_for_delayed_product():
+    with LocalShop(visibility_delay=0.3) as shop:
+        with api.ProductClient(shop.base_url, retries=0) as client:
+            since = time.monotonic()
+            product_id = client.add_product(product())["id"]
+            assert client.get_product_by_id(product_id) is None
+
+            assert client.wait_for_product(product_id, timeout=5, since=since)["alias"] == "test-watch"
+            client.delete_product(product_id)
+            assert client.wait_for_absence(product_id, timeout=5)
+
+            hidden = client.add_product(product(category_id="15"))["id"]
+            assert client.wait_for_product(hidden, timeout=0.2) is None
+
+    appear = client.visibility.summary()["appear"]
+    assert appear["count"] == 1 and appear["timeouts"] == 1
+    assert 0.3 <= appear["max"] < 1.5
+    assert appear["polls"] > 2
+    assert client.visibility.summary()["disappear"]["count"] == 1
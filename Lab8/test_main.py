@@ -1,6 +1,17 @@
+import os
+import time
+
 import pytest
 import json
 import api
+from cleanup import ProductCleaner, TrackedIds
+from local_shop import LocalShop
+from product_factory import namespace_templates
+from schema_validator import SchemaValidator
+
+# Под pytest-xdist у каждого воркера свой журнал и свои названия товаров
+WORKER = os.environ.get('PYTEST_XDIST_WORKER', '')
+CLEANUP_JOURNAL = f'.cleanup_journal.{WORKER}' if WORKER else '.cleanup_journal'
 
 
 def check_product_details(expected, actual):
@@ -14,18 +25,56 @@ def product_schema():
     with open('schema.json', 'r') as f:
         return json.load(f)
 
+@pytest.fixture(scope="session")
+def product_validator(product_schema):
+    return SchemaValidator(product_schema)
+
 @pytest.fixture(scope="session")
 def test_data():
     with open('tests.json', 'r') as f:
-        return json.load(f)['test_data']
+        data = json.load(f)['test_data']
+    return namespace_templates(data, WORKER) if WORKER else data
+
+def use_local_shop():
+    return os.environ.get('SHOP_URL') == 'local'
+
+@pytest.fixture(scope="session", autouse=True)
+def shop_url():
+    # По умолчанию тесты идут на живой сервер; SHOP_URL=local поднимает локальный магазин,
+    # любой другой SHOP_URL задаёт адрес сервера
+    if not use_local_shop():
+        original_url = api.BASE_URL
+        api.BASE_URL = os.environ.get('SHOP_URL') or original_url
+        yield api.BASE_URL
+        api.BASE_URL = original_url
+        return
+
+    with LocalShop(latency=float(os.environ.get('SHOP_LATENCY', 0))) as shop:
+        original_url, api.BASE_URL = api.BASE_URL, shop.base_url
+        yield shop.base_url
+        api.BASE_URL = original_url
+
+@pytest.fixture(scope="session")
+def product_cleaner(shop_url, tmp_path_factory):
+    # Журнал нужен только живому серверу: локальный магазин живёт одну сессию
+    if use_local_shop():
+        journal = str(tmp_path_factory.mktemp('cleanup') / CLEANUP_JOURNAL)
+    else:
+        journal = os.environ.get('PRODUCT_CLEANUP_JOURNAL', CLEANUP_JOURNAL)
+    # Первый sweep удаляет товары, оставшиеся от упавшего прошлого запуска
+    cleaner = ProductCleaner(journal)
+    cleaner.sweep()
+    yield cleaner
+    report = cleaner.sweep()
+    assert not report.failed, f"Failed delete products: {report.failed}"
 
 @pytest.fixture
-def cleanup_products():
-    created_product_ids = []
+def cleanup_products(product_cleaner):
+    # Товары теста удаляются сразу: иначе их алиасы сдвинут суффиксы в следующих тестах
+    created_product_ids = TrackedIds(product_cleaner)
     yield created_product_ids
-    for product_id in created_product_ids:
-        delete_response = api.delete_product(product_id)
-        assert delete_response and delete_response.get('status') == 1, f"Failed delete product with ID {product_id}"
+    report = product_cleaner.sweep(created_product_ids)
+    assert not report.failed, f"Failed delete products: {report.failed}"
 
 class TestProductAPI:
     # delete tests
@@ -52,7 +101,7 @@ class TestProductAPI:
         assert delete_response.get('status') == 0, f"Delete not existing product status should be 0"
 
     # add tests
-    def test_add_correct_product(self, test_data, cleanup_products, product_schema):
+    def test_add_correct_product(self, test_data, cleanup_products, product_validator):
         product = test_data['correctProduct']
 
         add_response = api.add_product(product)
@@ -65,6 +114,8 @@ class TestProductAPI:
 
         created_product = api.get_product_by_id(product_id)
         assert created_product is not None, f"Created product with ID {product_id} not found"
+        errors = product_validator.validate(created_product)
+        assert not errors, f"Created product does not match schema: {errors}"
 
         check_product_details(product, created_product)
 
@@ -144,6 +195,7 @@ class TestProductAPI:
         """
         product = test_data['incorrectProduct_status15'].copy()
 
+        since = time.monotonic()
         add_response = api.add_product(product)
 
         assert add_response is not None, "Empty response"
@@ -152,7 +204,8 @@ class TestProductAPI:
         product_id = add_response.get('id')
         cleanup_products.append(product_id)
 
-        created_product = api.get_product_by_id(product_id)
+        # Ждём с backoff вместо одного запроса: так видно, задержка это или товар не отдаётся вовсе
+        created_product = api.wait_for_product(product_id, timeout=3, since=since)
         assert created_product is not None, f"Created product with ID {product_id} not found" # Падает здесь
 
         check_product_details(product, created_product)
@@ -164,7 +217,7 @@ class TestProductAPI:
         assert isinstance(response, str) or response is None, "Expected error, but got JSON"
 
     # edit tests
-    def test_edit_correct_product(self, test_data, cleanup_products, product_schema):
+    def test_edit_correct_product(self, test_data, cleanup_products, product_validator):
         product = test_data['correctProduct']
 
         add_response = api.add_product(product)
@@ -172,7 +225,7 @@ class TestProductAPI:
 
         cleanup_products.append(product_id)
 
-        edited_product = test_data['correctProductEdited']
+        edited_product = test_data['correctProductEdited'].copy()
         edited_product['id'] = add_response['id']
 
         edit_response = api.edit_product(edited_product)
@@ -182,6 +235,8 @@ class TestProductAPI:
         edited_product_details = api.get_product_by_id(product_id)
 
         assert edited_product_details is not None, f"Edited product with ID {product_id} not found"
+        errors = product_validator.validate(edited_product_details)
+        assert not errors, f"Edited product does not match schema: {errors}"
 
         edited_product['alias'] = f"edited_product['alias']-{product_id}"
         edited_product_details['alias'] = f"edited_product['alias']-{product_id}"
@@ -196,7 +251,7 @@ class TestProductAPI:
 
         cleanup_products.append(product_id)
 
-        edited_product = test_data['invalidProductEdited']
+        edited_product = test_data['invalidProductEdited'].copy()
         edited_product['id'] = add_response['id']
 
         edit_response = api.edit_product(edited_product)
@@ -0,0 +1,95 @@
+import pytest
+
+from cleanup import ProductCleaner
+from local_shop import LocalShop
+from product_factory import ProductFactory, bulk_seed, namespace_templates
+from schema_validator import SchemaValidator
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return SchemaValidator.from_file("schema.json")
+
+
+@pytest.fixture
+def factory():
+    return ProductFactory.from_file(seed=3)
+
+
+def test_products_are_unique_valid_and_seeded(factory, validator):
+    products = factory.batch(1000)
+
+    assert len({p["id"] for p in products}) == len({p["alias"] for p in products}) == 1000
+    assert validator.validate_many(products) == []
+    assert ProductFactory.from_file(seed=3).batch(5) == products[:5]
+    assert ProductFactory.from_file(seed=4).batch(5) != products[:5]
+
+
+def test_products_are_independent_copies(factory):
+    first = factory.make()
+    first["id"] = "1"
+
+    assert factory.templates["correctProduct"]["id"] == "6789"
+    assert factory.make("correctProductEdited")["title"].startswith("Test watch edited ")
+
+
+def test_boundary_variants_are_valid(factory, validator):
+    for name, product in factory.boundary():
+        assert validator.validate(product) == [], name
+
+
+def test_boundary_variants_do_not_collide(factory):
+    first, second = dict(factory.boundary()), dict(factory.boundary())
+
+    assert len(first["title_one_char"]["title"]) == 1
+    assert first["title_one_char"]["alias"] != second["title_one_char"]["alias"]
+    assert first["category_max"]["category_id"] == "15"
+    assert {p["category_id"] for p in factory.batch(500)} == {str(i) for i in range(1, 15)}
+
+
+def test_invalid_variants_break_one_rule(factory, validator):
+    for name, product in factory.invalid():
+        assert len(validator.validate(product)) == 1, name
+
+
+def test_bulk_seed_reports_throughput(factory, tmp_path):
+    products = factory.batch(60) + [factory.make(price="abc")]
+
+    with LocalShop(latency=0.01) as shop:
+        cleaner = ProductCleaner(str(tmp_path / "journal"), shop.base_url)
+        report = bulk_seed(products, shop.base_url, concurrency=20, cleaner=cleaner)
+        assert len(shop.products) == 60
+
+    assert len(report.created) == 60 and len(report.failed) == 1
+    assert report.failed[0][0]["price"] == "abc"
+    assert report.rate > 0
+    assert sorted(cleaner.pending()) == sorted(report.created)
+
+
+def test_namespaced_templates_do_not_share_aliases(factory):
+    gw0 = namespace_templates(factory.templates, "gw0")
+    gw1 = namespace_templates(factory.templates, "gw1")
+
+    assert gw0["correctProduct"]["title"] == "Test watch gw0"
+    assert gw0["correctProduct"]["alias"] == "test-watch-gw0"
+    assert gw1["correctProduct"]["alias"] == "test-watch-gw1"
+    assert gw0["incorrectProduct_emptyProduct"] == {}
+    assert factory.templates["correctProduct"]["title"] == "Test watch"
+
+
+def test_bulk_seed_tracks_each_id_as_it_is_created(factory, tmp_path):
+    products = factory.batch(10)
+
+    with LocalShop(latency=0.01) as shop:
+        cleaner = ProductCleaner(str(tmp_path / "journal"), shop.base_url)
+        journalled = []
+
+        def track(product_id):
+            # Товар уже на сервере, а остальные добавления ещё в полёте
+            journalled.append((product_id, len(shop.products)))
+
+        cleaner.track = track
+        bulk_seed(products, shop.base_url, concurrency=2, cleaner=cleaner)
+
+    assert len(journalled) == 10
+    assert min(count for _, count in journalled) < 10
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from product_factory import ProductFactory
+from schema_validator import SchemaValidator, compile_pattern
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return SchemaValidator.from_file("schema.json")
+
+
+@pytest.fixture(scope="module")
+def correct_product():
+    with open("tests.json") as f:
+        product = json.load(f)["test_data"]["correctProduct"]
+    return dict(product, alias="test-watch")
+
+
+def test_correct_product_is_valid(validator, correct_product):
+    assert validator.is_valid(correct_product)
+    assert validator.validate(correct_product) == []
+    assert validator.validate(dict(correct_product, content=None, old_price=None)) == []
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("price", "-123", "$.price: '-123' does not match"),
+    ("category_id", "16", "$.category_id: '16' does not match"),
+    ("status", "2", "$.status: '2' does not match"),
+    ("hit", 1, "$.hit: 1 is not of type string"),
+    ("title", "", "$.title: '' is shorter than 1"),
+])
+def test_field_errors(validator, correct_product, field, value, message):
+    errors = validator.validate(dict(correct_product, **{field: value}))
+
+    assert len(errors) == 1 and errors[0].startswith(message)
+
+
+def test_object_errors(validator, correct_product):
+    product = dict(correct_product, extra="1")
+    del product["hit"]
+
+    assert validator.validate(product) == ["$: 'hit' is a required property",
+                                           "$: additional property 'extra' is not allowed"]
+    assert validator.validate([]) == ["$: [] is not of type object"]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_batch_reports_invalid_products_only(validator, correct_product, processes):
+    catalog = [dict(correct_product, id=str(i)) for i in range(50)]
+    catalog[7]["price"] = "free"
+    catalog[42]["status"] = "9"
+
+    reports = validator.validate_many(catalog, processes=processes, chunk_size=10)
+
+    assert [(report.index, report.product_id) for report in reports] == [(7, "7"), (42, "42")]
+    assert reports[1].errors == ["$.status: '9' does not match '^[01]$'"]
+
+
+def test_patterns_are_compiled_once(validator):
+    assert compile_pattern("^[01]$") is compile_pattern("^[01]$")
+    assert compile_pattern.cache_info().currsize >= 4
+
+
+def test_unsupported_keywords_are_rejected():
+    with pytest.raises(ValueError):
+        SchemaValidator({"type": "object", "patternProperties": {}})
+
+
+def test_predicate_and_closures_agree(validator):
+    factory = ProductFactory.from_file(seed=3)
+    variants = [*factory.boundary(), *factory.invalid(), ("batch", factory.make()),
+                ("not_object", []), ("null", None)]
+    for name, product in variants:
+        errors = validator._check(product, "$")
+        assert validator.is_valid(product) == (errors == []), name
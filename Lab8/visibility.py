@@ -0,0 +1,45 @@
+import threading
+from typing import Dict, List
+
+
+class VisibilityStats:
+    """Time from a write until the catalog reflects it, per kind of wait.
+
+    ``appear`` samples come from wait_for_product, ``disappear`` ones from
+    wait_for_absence. Waits that ran out of time are counted separately
+    and add no sample.
+    """
+
+    def __init__(self):
+        self._samples: Dict[str, List[float]] = {"appear": [], "disappear": []}
+        self._polls: Dict[str, int] = {"appear": 0, "disappear": 0}
+        self._timeouts: Dict[str, int] = {"appear": 0, "disappear": 0}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float, polls: int):
+        with self._lock:
+            self._samples[kind].append(seconds)
+            self._polls[kind] += polls
+
+    def record_timeout(self, kind: str, polls: int):
+        with self._lock:
+            self._timeouts[kind] += 1
+            self._polls[kind] += polls
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {kind: _summarize(samples, self._polls[kind], self._timeouts[kind])
+                    for kind, samples in self._samples.items()}
+
+
+def _summarize(samples: List[float], polls: int, timeouts: int) -> dict:
+    summary = {"count": len(samples), "timeouts": timeouts, "polls": polls}
+    if samples:
+        ordered = sorted(samples)
+        summary.update(
+            mean=sum(ordered) / len(ordered),
+            p50=ordered[int(0.5 * (len(ordered) - 1))],
+            p95=ordered[int(0.95 * (len(ordered) - 1))],
+            max=ordered[-1],
+        )
+    return summary